@@ -3,7 +3,7 @@ import sys, os
 from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from protocol import ClientOpcode
+from protocol import ClientOpcode, CLIENT_OPCODE_NAMES
 
 SNIFF_LOG = Path(__file__).parent.parent / "sniff_log.txt"
 
@@ -14,10 +14,7 @@ async def run(bot):
 
     def sniffer(opcode, reader):
         try:
-            try:
-                name = ClientOpcode(opcode).name
-            except ValueError:
-                name = "?"
+            name = CLIENT_OPCODE_NAMES.get(opcode, "?")
 
             raw = reader.peek_remaining()
             hex_dump = raw.hex(" ") if raw else "(empty)"
@@ -15,9 +15,9 @@ Note: For the proxy to work, the client must use our RSA public key.
 import asyncio
 import sys
 import logging
-from proxy import OTProxy
+from proxy import OTProxy, install_fast_event_loop
 from protocol import (
-    Direction, ClientOpcode, ServerOpcode, PacketReader,
+    Direction, ServerOpcode, PacketReader, CLIENT_OPCODE_NAMES,
     build_walk_packet, build_attack_packet, build_say_packet,
     build_stop_walk_packet, build_turn_packet, build_follow_packet,
     build_set_fight_modes_packet, build_ping_packet
@@ -90,11 +90,9 @@ class DBVBot:
 
     def on_client_packet(self, opcode: int, reader: PacketReader):
         """Log client actions."""
-        try:
-            name = ClientOpcode(opcode).name
+        name = CLIENT_OPCODE_NAMES.get(opcode)
+        if name is not None:
             log.debug(f"Player action: {name}")
-        except ValueError:
-            pass
 
     def _parse_player_stats(self, reader: PacketReader):
         """Parse player stats packet."""
@@ -235,7 +233,7 @@ Control:
 
 async def cli_loop(bot: DBVBot):
     """Interactive command line loop."""
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
 
     while True:
         try:
@@ -340,4 +338,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    install_fast_event_loop()
     asyncio.run(main())
@@ -449,23 +449,25 @@ def _simplify_path(points: list[tuple], max_gap: int = 3) -> list[tuple]:
     and the first point after are force-kept so stair/ramp tiles are never
     dropped by the gap filter.
     """
-    if len(points) <= 1:
+    n = len(points)
+    if n <= 1:
         return points
 
-    # Pre-compute which indices sit at a floor boundary and must be kept.
-    floor_boundary = set()
-    for i in range(1, len(points)):
-        if points[i][2] != points[i - 1][2]:
-            floor_boundary.add(i - 1)  # last point before Z change
-            floor_boundary.add(i)      # first point after Z change
-
-    result = [points[0]]
-    for i in range(1, len(points)):
+    # Single pass: (kx, ky) is the last kept point; a point is a floor
+    # boundary if its z differs from the previous (first after a Z change)
+    # or the next point's (last before a Z change).
+    first = points[0]
+    result = [first]
+    kx, ky, prev_z = first[0], first[1], first[2]
+    last = n - 1
+    for i in range(1, n):
         p = points[i]
-        is_last = i == len(points) - 1
-        dist = _manhattan(p, result[-1])
-        if is_last or dist >= max_gap or i in floor_boundary:
+        x, y, z = p[0], p[1], p[2]
+        if (i == last or abs(x - kx) + abs(y - ky) >= max_gap
+                or z != prev_z or points[i + 1][2] != z):
             result.append(p)
+            kx, ky = x, y
+        prev_z = z
     return result
 
 
@@ -23,6 +23,10 @@ GAME_PORT = 7172
 SERVER_IP_BYTES = bytes(int(b) for b in SERVER_HOST.split("."))  # e.g. b'\x57\x62\xdc\xd7'
 SERVER_IP_STR = SERVER_HOST.encode("ascii")                      # e.g. b'87.98.220.215'
 
+# Replacements for the above, same length so the character list layout is kept
+LOCALHOST_IP_BYTES = b"\x7f\x00\x00\x01"
+LOCALHOST_IP_STR = (b"127.0.0.1" + b"\x00" * max(0, len(SERVER_IP_STR) - 9))[:len(SERVER_IP_STR)]
+
 # ── Item IDs ───────────────────────────────────────────────────────
 ITEM_RED_HAM = 3583
 ITEM_RUNE_3165 = 3165
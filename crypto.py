@@ -2,7 +2,14 @@
 OT Protocol Cryptography - XTEA and RSA for Open Tibia protocol.
 """
 
+import ctypes
+import functools
+import os
 import struct
+import sys
+import threading
+import zlib
+from array import array
 from Crypto.PublicKey import RSA
 
 
@@ -17,14 +24,120 @@ DEFAULT_RSA_D = int(
 )
 
 
+# Optional accelerated XTEA, tried in order:
+#   1. native/xtea.c (build with `cd native && make`), loaded via ctypes
+#   2. numba-compiled kernels, if numba + numpy are installed
+#   3. the pure-Python implementation below
+# Below this size the call overhead outweighs the speed-up.
+NATIVE_XTEA_MIN_LEN = 64
+
+_NATIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "native")
+_NATIVE_LIB = "xtea.dll" if sys.platform == "win32" else "libxtea.so"
+
+try:
+    _xtea_lib = ctypes.CDLL(os.path.join(_NATIVE_DIR, _NATIVE_LIB))
+    for _fn in (_xtea_lib.xtea_encrypt, _xtea_lib.xtea_decrypt):
+        _fn.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p]
+        _fn.restype = None
+except OSError:
+    _xtea_lib = None
+
+XTEA_ROUNDS = 32
+XTEA_DELTA = 0x61C88647
+
+_xtea_encrypt_nb = None
+_xtea_decrypt_nb = None
+if _xtea_lib is None:
+    try:
+        import numpy as np
+        from numba import njit
+    except ImportError:
+        njit = None
+
+    if njit is not None:
+        # v is the buffer viewed as little-endian uint32 words (v0, v1 pairs),
+        # ks the xtea_schedule() table. Arithmetic runs in int64 and is masked
+        # back to 32 bits, so numba's integer promotion cannot change results.
+        @njit(cache=True, boundscheck=False)
+        def _xtea_encrypt_nb(v, ks):
+            for i in range(0, v.shape[0], 2):
+                v0 = np.int64(v[i])
+                v1 = np.int64(v[i + 1])
+                for r in range(32):
+                    v0 = (v0 + ((((v1 << 4) ^ (v1 >> 5)) + v1) ^ ks[2 * r])) & 0xFFFFFFFF
+                    v1 = (v1 + ((((v0 << 4) ^ (v0 >> 5)) + v0) ^ ks[2 * r + 1])) & 0xFFFFFFFF
+                v[i] = v0
+                v[i + 1] = v1
+
+        @njit(cache=True, boundscheck=False)
+        def _xtea_decrypt_nb(v, ks):
+            for i in range(0, v.shape[0], 2):
+                v0 = np.int64(v[i])
+                v1 = np.int64(v[i + 1])
+                for r in range(31, -1, -1):
+                    v1 = (v1 - ((((v0 << 4) ^ (v0 >> 5)) + v0) ^ ks[2 * r + 1])) & 0xFFFFFFFF
+                    v0 = (v0 - ((((v1 << 4) ^ (v1 >> 5)) + v1) ^ ks[2 * r])) & 0xFFFFFFFF
+                v[i] = v0
+                v[i + 1] = v1
+
+_BLOCK = struct.Struct('<II')   # one XTEA block as (v0, v1)
+_U32 = struct.Struct('<I')
+
+
+def xtea_schedule(key: tuple[int, int, int, int]) -> array:
+    """
+    Precompute the XTEA round-key terms for a key.
+
+    The `sum + key[...]` terms depend only on the key, so they are the same
+    for every block of every packet in a session. Entry 2*r is the v0 term
+    and 2*r + 1 the v1 term of encryption round r; decryption walks the
+    same table backwards.
+
+    Returns:
+        array('I') of 2 * XTEA_ROUNDS uint32 values
+    """
+    ks = array('I', bytes(8 * XTEA_ROUNDS))
+    sum_val = 0
+    for r in range(XTEA_ROUNDS):
+        ks[2 * r] = (sum_val + key[sum_val & 3]) & 0xFFFFFFFF
+        sum_val = (sum_val - XTEA_DELTA) & 0xFFFFFFFF
+        ks[2 * r + 1] = (sum_val + key[(sum_val >> 11) & 3]) & 0xFFFFFFFF
+    return ks
+
+
+def _xtea_accel(encrypt: bool, buf: bytearray, offset: int, length: int, schedule: array) -> bool:
+    """
+    Run XTEA in place over buf[offset:offset + length] with the native
+    library or numba. Returns False if neither is available (or the buffer
+    is too small to be worth it), leaving the work to the Python path.
+    """
+    if length < NATIVE_XTEA_MIN_LEN:
+        return False
+    if _xtea_lib is not None:
+        fn = _xtea_lib.xtea_encrypt if encrypt else _xtea_lib.xtea_decrypt
+        fn(ctypes.addressof(ctypes.c_char.from_buffer(buf, offset)), length, schedule.buffer_info()[0])
+        return True
+    if _xtea_encrypt_nb is not None:
+        v = np.frombuffer(buf, dtype='<u4', count=length // 4, offset=offset)
+        ks = np.frombuffer(schedule, dtype=np.uint32)
+        (_xtea_encrypt_nb if encrypt else _xtea_decrypt_nb)(v, ks)
+        return True
+    return False
+
+
 def generate_proxy_rsa_keypair():
     """Generate a new 1024-bit RSA key pair for the proxy."""
     key = RSA.generate(1024)
     return key
 
 
+@functools.lru_cache(maxsize=None)
 def get_default_rsa_key():
-    """Get the default OTClient RSA key."""
+    """Get the default OTClient RSA key.
+
+    Built once and shared: RSA.construct() recovers p/q from (n, e, d),
+    which costs tens of ms per call. RsaKey objects are immutable.
+    """
     return RSA.construct((DEFAULT_RSA_N, DEFAULT_RSA_E, DEFAULT_RSA_D))
 
 
@@ -56,13 +169,15 @@ def rsa_encrypt(data: bytes, public_key: RSA.RsaKey) -> bytes:
     return encrypted_int.to_bytes(key_size, byteorder='big')
 
 
-def xtea_decrypt(data: bytes, key: tuple[int, int, int, int]) -> bytes:
+def xtea_decrypt(data: bytes, key: tuple[int, int, int, int], schedule: array | None = None) -> bytes:
     """
     Decrypt data using XTEA algorithm (as used in OT protocol).
 
     Args:
-        data: Encrypted data (must be multiple of 8 bytes)
+        data: Encrypted data (must be multiple of 8 bytes); any bytes-like
+            object, so callers can pass a memoryview slice without copying
         key: Tuple of 4 uint32 values
+        schedule: Optional xtea_schedule(key), to skip re-deriving it per call
 
     Returns:
         Decrypted data
@@ -70,59 +185,171 @@ def xtea_decrypt(data: bytes, key: tuple[int, int, int, int]) -> bytes:
     if len(data) % 8 != 0:
         raise ValueError(f"Data length ({len(data)}) must be multiple of 8")
 
-    result = bytearray()
-    num_rounds = 32
-    delta = 0x61C88647
+    return bytes(_xtea_decrypt_blocks(data, schedule or xtea_schedule(key)))
+
+
+def _xtea_decrypt_range(buf: bytearray, offset: int, length: int, schedule: array):
+    """XTEA-decrypt buf[offset:offset + length] in place (length multiple of 8)."""
+    if _xtea_accel(False, buf, offset, length, schedule):
+        return
+
+    rounds = [(schedule[r], schedule[r + 1]) for r in range(2 * XTEA_ROUNDS - 2, -1, -2)]
+
+    for i in range(offset, offset + length, 8):
+        v0, v1 = _BLOCK.unpack_from(buf, i)
+
+        for k0, k1 in rounds:
+            v1 = (v1 - ((((v0 << 4) ^ (v0 >> 5)) + v0) ^ k1)) & 0xFFFFFFFF
+            v0 = (v0 - ((((v1 << 4) ^ (v1 >> 5)) + v1) ^ k0)) & 0xFFFFFFFF
+
+        _BLOCK.pack_into(buf, i, v0, v1)
+
+
+def _xtea_decrypt_blocks(data, schedule: array) -> bytearray:
+    """XTEA-decrypt 8-byte aligned data into a new bytearray."""
+    buf = bytearray(data)
+    _xtea_decrypt_range(buf, 0, len(buf), schedule)
+    return buf
 
-    for i in range(0, len(data), 8):
-        v0, v1 = struct.unpack_from('<II', data, i)
-        sum_val = 0xC6EF3720  # (delta * num_rounds) & 0xFFFFFFFF
 
-        for _ in range(num_rounds):
-            v1 = (v1 - (((v0 << 4) ^ (v0 >> 5)) + v0 ^ sum_val + key[(sum_val >> 11) & 3])) & 0xFFFFFFFF
-            sum_val = (sum_val + delta) & 0xFFFFFFFF
-            v0 = (v0 - (((v1 << 4) ^ (v1 >> 5)) + v1 ^ sum_val + key[sum_val & 3])) & 0xFFFFFFFF
+class _BufPool:
+    """
+    Thread-local free lists of scratch bytearrays, keyed by power-of-two
+    size class. Used for decrypt work that never escapes crypto.py, so the
+    per-packet scratch buffer is recycled instead of reallocated.
+    """
+
+    MAX_FREE_PER_CLASS = 4
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, n: int) -> bytearray:
+        slots = self._slots()
+        size = 1 << max(n - 1, 0).bit_length()
+        free = slots.get(size)
+        if free:
+            return free.pop()
+        return bytearray(size)
+
+    def put(self, buf: bytearray):
+        free = self._slots().setdefault(len(buf), [])
+        if len(free) < self.MAX_FREE_PER_CLASS:
+            free.append(buf)
+
+    def _slots(self) -> dict:
+        slots = getattr(self._local, "slots", None)
+        if slots is None:
+            slots = self._local.slots = {}
+        return slots
+
+
+_scratch = _BufPool()
+
+
+def xtea_decrypt_packet(data, key: tuple[int, int, int, int],
+                        schedule: array | None = None) -> bytes | None:
+    """
+    Decrypt a full OT game packet body in one pass.
+
+    Detects and skips the optional adler32 checksum, XTEA-decrypts the rest
+    in a pooled scratch buffer and strips the inner u16 length; the only
+    allocation is the returned payload.
+
+    Args:
+        data: Packet body without the outer u16 length header (bytes-like)
+        key: Tuple of 4 uint32 values
+        schedule: Optional xtea_schedule(key), to skip re-deriving it per call
+
+    Returns:
+        Decrypted payload, or None if the packet is misaligned or malformed
+    """
+    view = memoryview(data)
+    offset = 0
+    if len(view) > 4:
+        if _U32.unpack_from(view, 0)[0] == adler32_checksum(view[4:]):
+            offset = 4
 
-        result.extend(struct.pack('<II', v0, v1))
+    encrypted = view[offset:]
+    n = len(encrypted)
+    if not n or n % 8 != 0:
+        return None
 
-    return bytes(result)
+    buf = _scratch.get(n)
+    try:
+        buf[:n] = encrypted
+        _xtea_decrypt_range(buf, 0, n, schedule or xtea_schedule(key))
+        inner_len = buf[0] | (buf[1] << 8)
+        if inner_len > n - 2:
+            return None
+        return bytes(memoryview(buf)[2:2 + inner_len])
+    finally:
+        _scratch.put(buf)
 
 
-def xtea_encrypt(data: bytes, key: tuple[int, int, int, int]) -> bytes:
+def xtea_encrypt(data: bytes, key: tuple[int, int, int, int], schedule: array | None = None) -> bytes:
     """
     Encrypt data using XTEA algorithm (as used in OT protocol).
 
     Args:
         data: Plain data (will be padded to multiple of 8 bytes)
         key: Tuple of 4 uint32 values
+        schedule: Optional xtea_schedule(key), to skip re-deriving it per call
 
     Returns:
         Encrypted data
     """
     # Pad to multiple of 8
     pad_len = (8 - (len(data) % 8)) % 8
+    buf = bytearray(data)
     if pad_len > 0:
-        data = data + b'\x00' * pad_len
+        buf.extend(bytes(pad_len))
 
-    result = bytearray()
-    num_rounds = 32
-    delta = 0x61C88647
+    xtea_encrypt_into(buf, key, schedule=schedule)
+    return bytes(buf)
 
-    for i in range(0, len(data), 8):
-        v0, v1 = struct.unpack_from('<II', data, i)
-        sum_val = 0
 
-        for _ in range(num_rounds):
-            v0 = (v0 + (((v1 << 4) ^ (v1 >> 5)) + v1 ^ sum_val + key[sum_val & 3])) & 0xFFFFFFFF
-            sum_val = (sum_val - delta) & 0xFFFFFFFF
-            v1 = (v1 + (((v0 << 4) ^ (v0 >> 5)) + v0 ^ sum_val + key[(sum_val >> 11) & 3])) & 0xFFFFFFFF
+def xtea_encrypt_into(buf: bytearray, key: tuple[int, int, int, int], offset: int = 0,
+                      length: int | None = None, schedule: array | None = None) -> None:
+    """
+    Encrypt buf[offset:offset + length] in place with XTEA.
 
-        result.extend(struct.pack('<II', v0, v1))
+    Lets callers lay out a whole packet (checksum, length header, payload)
+    in one preallocated buffer and encrypt the body without extra copies.
 
-    return bytes(result)
+    Args:
+        buf: Writable buffer
+        key: Tuple of 4 uint32 values
+        offset: Start of the region to encrypt
+        length: Region size (must be multiple of 8); defaults to the rest of buf
+        schedule: Optional xtea_schedule(key), to skip re-deriving it per call
+    """
+    if length is None:
+        length = len(buf) - offset
+    if length % 8 != 0:
+        raise ValueError(f"Data length ({length}) must be multiple of 8")
+    if schedule is None:
+        schedule = xtea_schedule(key)
+
+    if _xtea_accel(True, buf, offset, length, schedule):
+        return
+
+    rounds = [(schedule[r], schedule[r + 1]) for r in range(0, 2 * XTEA_ROUNDS, 2)]
+
+    for i in range(offset, offset + length, 8):
+        v0, v1 = _BLOCK.unpack_from(buf, i)
+
+        for k0, k1 in rounds:
+            v0 = (v0 + ((((v1 << 4) ^ (v1 >> 5)) + v1) ^ k0)) & 0xFFFFFFFF
+            v1 = (v1 + ((((v0 << 4) ^ (v0 >> 5)) + v0) ^ k1)) & 0xFFFFFFFF
+
+        _BLOCK.pack_into(buf, i, v0, v1)
 
 
 def adler32_checksum(data: bytes) -> int:
-    """Calculate Adler-32 checksum as used in OT protocol."""
-    import zlib
+    """Calculate Adler-32 checksum as used in OT protocol.
+
+    Accepts any bytes-like object; pass a memoryview slice to checksum part
+    of a packet without copying it.
+    """
     return zlib.adler32(data) & 0xFFFFFFFF
@@ -33,7 +33,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from mcp.server.fastmcp import FastMCP
 
-from proxy import OTProxy
+from proxy import OTProxy, install_fast_event_loop
 from game_state import GameState, parse_server_packet, scan_packet
 from protocol import (
     Direction,
@@ -52,6 +52,7 @@ from protocol import (
     ClientOpcode,
     ServerOpcode,
     PacketReader,
+    CLIENT_OPCODE_NAMES,
 )
 from constants import SERVER_HOST, LOGIN_PORT, GAME_PORT
 import cavebot
@@ -896,12 +897,18 @@ async def start_bot() -> str:
         log.info(f"Closed {closed} existing game connection(s) — client should return to login screen")
         await asyncio.sleep(2)  # Give the client time to process the disconnect
 
-    from patcher import find_server_address_in_memory, patch_memory
+    from patcher import find_server_address_in_memory, patch_memory_bulk
 
-    ip_locs = find_server_address_in_memory(pm)
-    localhost = b"127.0.0.1"
-    patched = sum(1 for addr, old in ip_locs if patch_memory(pm, addr, old, localhost))
-    pm.close_process()
+    def _patch_ips():
+        ip_locs = find_server_address_in_memory(pm)
+        return patch_memory_bulk(pm, ip_locs, b"127.0.0.1")
+
+    # The memory scan is blocking pymem I/O — keep it off the event loop so
+    # the MCP transport and any running tasks stay responsive meanwhile.
+    try:
+        patched = await asyncio.to_thread(_patch_ips)
+    finally:
+        pm.close_process()
 
     if patched == 0:
         # Client may already be patched from a previous session — continue anyway
@@ -918,11 +925,8 @@ async def start_bot() -> str:
     # on_raw_server_data, avoiding redundant double-parsing of every packet.
 
     def on_client_packet(opcode, reader):
-        try:
-            name = ClientOpcode(opcode).name
-        except ValueError:
-            name = "?"
-        log.debug(f"[C->S] 0x{opcode:02X} ({name})")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("[C->S] 0x%02X (%s)", opcode, CLIENT_OPCODE_NAMES.get(opcode, "?"))
         # Track current attack target in game_state
         if opcode == ClientOpcode.ATTACK:
             try:
@@ -971,7 +975,7 @@ async def start_bot() -> str:
     def on_raw_server_data(data):
         # Fire-and-forget: scan in thread pool so event loop stays responsive
         # for healing (auto_senzu), combat (auto_combat), and targeting actions.
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         loop.run_in_executor(_scan_pool, scan_packet, data, state.game_state)
 
     state.game_proxy.register_client_packet_callback(on_client_packet)
@@ -1681,4 +1685,5 @@ async def analyze_route() -> str:
 # ── Entry point ─────────────────────────────────────────────────────
 
 if __name__ == "__main__":
+    install_fast_event_loop()
     mcp.run(transport="stdio")
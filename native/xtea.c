@@ -0,0 +1,111 @@
+/*
+ * Native XTEA for the OT proxy (loaded by crypto.py via ctypes).
+ *
+ * Blocks are independent (ECB), so LANES blocks are processed side by side:
+ * each Feistel half-round runs over a small array of lanes, which gcc/clang
+ * auto-vectorize at -O3 into packed 32-bit add/xor/shift (8 lanes = one
+ * AVX2 register). Loads and stores go through memcpy so the compiler can
+ * vectorize without caring about buffer alignment.
+ *
+ * The round-key terms (sum + key[...]) only depend on the key, never on the
+ * data, so callers pass the 64-entry schedule from crypto.xtea_schedule()
+ * (computed once per session): ks[2*r] is the v0 term and ks[2*r + 1] the
+ * v1 term of encryption round r. Decryption walks the table backwards.
+ *
+ * Both functions work in place on len bytes; len must be a multiple of 8.
+ */
+
+#include <stddef.h>
+#include <stdint.h>
+#include <string.h>
+
+#ifdef _WIN32
+#define XTEA_EXPORT __declspec(dllexport)
+#else
+#define XTEA_EXPORT __attribute__((visibility("default")))
+#endif
+
+#define XTEA_ROUNDS 32
+#define LANES       8
+
+static inline uint32_t load32(const uint8_t *p)
+{
+    uint32_t v;
+    memcpy(&v, p, 4);
+    return v;
+}
+
+static inline void store32(uint8_t *p, uint32_t v)
+{
+    memcpy(p, &v, 4);
+}
+
+#define MIX(v) ((((v) << 4) ^ ((v) >> 5)) + (v))
+
+XTEA_EXPORT void xtea_encrypt(uint8_t *buf, size_t len, const uint32_t ks[2 * XTEA_ROUNDS])
+{
+    size_t i = 0;
+
+    for (; i + 8 * LANES <= len; i += 8 * LANES) {
+        uint32_t v0[LANES], v1[LANES];
+        for (int l = 0; l < LANES; l++) {
+            v0[l] = load32(buf + i + 8 * l);
+            v1[l] = load32(buf + i + 8 * l + 4);
+        }
+        for (int r = 0; r < XTEA_ROUNDS; r++) {
+            const uint32_t k0 = ks[2 * r], k1 = ks[2 * r + 1];
+            for (int l = 0; l < LANES; l++)
+                v0[l] += MIX(v1[l]) ^ k0;
+            for (int l = 0; l < LANES; l++)
+                v1[l] += MIX(v0[l]) ^ k1;
+        }
+        for (int l = 0; l < LANES; l++) {
+            store32(buf + i + 8 * l, v0[l]);
+            store32(buf + i + 8 * l + 4, v1[l]);
+        }
+    }
+
+    for (; i + 8 <= len; i += 8) {
+        uint32_t v0 = load32(buf + i), v1 = load32(buf + i + 4);
+        for (int r = 0; r < XTEA_ROUNDS; r++) {
+            v0 += MIX(v1) ^ ks[2 * r];
+            v1 += MIX(v0) ^ ks[2 * r + 1];
+        }
+        store32(buf + i, v0);
+        store32(buf + i + 4, v1);
+    }
+}
+
+XTEA_EXPORT void xtea_decrypt(uint8_t *buf, size_t len, const uint32_t ks[2 * XTEA_ROUNDS])
+{
+    size_t i = 0;
+
+    for (; i + 8 * LANES <= len; i += 8 * LANES) {
+        uint32_t v0[LANES], v1[LANES];
+        for (int l = 0; l < LANES; l++) {
+            v0[l] = load32(buf + i + 8 * l);
+            v1[l] = load32(buf + i + 8 * l + 4);
+        }
+        for (int r = XTEA_ROUNDS - 1; r >= 0; r--) {
+            const uint32_t k0 = ks[2 * r], k1 = ks[2 * r + 1];
+            for (int l = 0; l < LANES; l++)
+                v1[l] -= MIX(v0[l]) ^ k1;
+            for (int l = 0; l < LANES; l++)
+                v0[l] -= MIX(v1[l]) ^ k0;
+        }
+        for (int l = 0; l < LANES; l++) {
+            store32(buf + i + 8 * l, v0[l]);
+            store32(buf + i + 8 * l + 4, v1[l]);
+        }
+    }
+
+    for (; i + 8 <= len; i += 8) {
+        uint32_t v0 = load32(buf + i), v1 = load32(buf + i + 4);
+        for (int r = XTEA_ROUNDS - 1; r >= 0; r--) {
+            v1 -= MIX(v0) ^ ks[2 * r + 1];
+            v0 -= MIX(v1) ^ ks[2 * r];
+        }
+        store32(buf + i, v0);
+        store32(buf + i + 4, v1);
+    }
+}
@@ -0,0 +1,135 @@
+/*
+ * Native XTEA key-candidate scan for xtea_finder.py (loaded via ctypes).
+ *
+ * Applies the rules of xtea_finder._is_key_candidate to every window of 4
+ * consecutive little-endian uint32 words. The per-word tests are worked
+ * out once per word as a set of flag bits, a tile of words at a time, and
+ * the windows are then checked against the tile's flags. With AVX2 the
+ * printable-ASCII test runs on 8 words per compare.
+ *
+ * buf must hold n_windows + 3 words; window i starts at byte 4 * i. The
+ * indices of matching windows are written to out, which needs room for
+ * n_windows entries. Returns the number of matches.
+ */
+
+#include <stddef.h>
+#include <stdint.h>
+#include <string.h>
+
+#ifdef __AVX2__
+#include <immintrin.h>
+#endif
+
+#ifdef _WIN32
+#define XTEA_EXPORT __declspec(dllexport)
+#else
+#define XTEA_EXPORT __attribute__((visibility("default")))
+#endif
+
+enum {
+    F_NONZERO = 1,   /* k != 0 */
+    F_SMALL   = 2,   /* k < 1000 */
+    F_POINTER = 4,   /* looks like a heap/module pointer */
+    F_ASCII   = 8,   /* all four bytes printable ASCII */
+    F_SPREAD  = 16,  /* at least 3 distinct bytes */
+};
+
+static inline uint32_t load32(const uint8_t *p)
+{
+    uint32_t v;
+    memcpy(&v, p, 4);
+    return v;
+}
+
+/* Every flag except F_ASCII */
+static inline unsigned word_flags_base(uint32_t k)
+{
+    const unsigned b0 = k & 0xFF, b1 = (k >> 8) & 0xFF;
+    const unsigned b2 = (k >> 16) & 0xFF, b3 = k >> 24;
+    unsigned f = 0;
+
+    if (k != 0)
+        f |= F_NONZERO;
+    if (k < 1000)
+        f |= F_SMALL;
+    if (k >= 0x00400000u && k <= 0x7FFFFFFFu)
+        f |= F_POINTER;
+    /* >= 3 distinct bytes iff at most one of the 6 byte pairs match */
+    if ((b0 == b1) + (b0 == b2) + (b0 == b3) + (b1 == b2) + (b1 == b3) + (b2 == b3) <= 1)
+        f |= F_SPREAD;
+    return f;
+}
+
+static inline unsigned word_flags(uint32_t k)
+{
+    const unsigned b0 = k & 0xFF, b1 = (k >> 8) & 0xFF;
+    const unsigned b2 = (k >> 16) & 0xFF, b3 = k >> 24;
+    unsigned f = word_flags_base(k);
+
+    /* b - 32 <= 94 (unsigned) is 32 <= b <= 126 */
+    if (b0 - 32u <= 94u && b1 - 32u <= 94u && b2 - 32u <= 94u && b3 - 32u <= 94u)
+        f |= F_ASCII;
+    return f;
+}
+
+#ifdef __AVX2__
+/* Bit j set iff byte j of p[0..31] is printable ASCII (32..126). Bytes
+ * >= 128 compare as negative, so they fail the > 31 test. */
+static inline uint32_t ascii_mask32(const uint8_t *p)
+{
+    const __m256i v = _mm256_loadu_si256((const __m256i *)p);
+    const __m256i lo = _mm256_cmpgt_epi8(v, _mm256_set1_epi8(31));
+    const __m256i hi = _mm256_cmpgt_epi8(_mm256_set1_epi8(127), v);
+    return (uint32_t)_mm256_movemask_epi8(_mm256_and_si256(lo, hi));
+}
+#endif
+
+/* Flags of the n words at p, written to f */
+static void tile_flags(const uint8_t *p, size_t n, uint8_t *f)
+{
+    size_t j = 0;
+
+#ifdef __AVX2__
+    /* 8 words per 32-byte compare; a word is ASCII iff its 4 bits are set */
+    for (; j + 8 <= n; j += 8) {
+        const uint32_t m = ascii_mask32(p + 4 * j);
+        for (unsigned k = 0; k < 8; k++)
+            f[j + k] = (uint8_t)(word_flags_base(load32(p + 4 * (j + k)))
+                                 | (((m >> (4 * k)) & 0xF) == 0xF ? F_ASCII : 0));
+    }
+#endif
+    for (; j < n; j++)
+        f[j] = (uint8_t)word_flags(load32(p + 4 * j));
+}
+
+#define COUNT(bit) \
+    ((((fa) & (bit)) != 0) + (((fb) & (bit)) != 0) + (((fc) & (bit)) != 0) + (((fd) & (bit)) != 0))
+
+#define TILE 1024
+
+XTEA_EXPORT size_t xtea_scan(const uint8_t *buf, size_t n_windows, int64_t *out)
+{
+    uint8_t flags[TILE + 3];
+    size_t count = 0;
+
+    for (size_t t = 0; t < n_windows; t += TILE) {
+        const size_t n = n_windows - t < TILE ? n_windows - t : TILE;
+        const uint8_t *p = buf + 4 * t;
+
+        tile_flags(p, n + 3, flags);
+        for (size_t i = 0; i < n; i++) {
+            const unsigned fa = flags[i], fb = flags[i + 1], fc = flags[i + 2], fd = flags[i + 3];
+            const uint32_t ka = load32(p + 4 * i);
+
+            if (COUNT(F_NONZERO) >= 3
+                && !(ka == load32(p + 4 * i + 4) && ka == load32(p + 4 * i + 8)
+                     && ka == load32(p + 4 * i + 12))
+                && !(fa & fb & fc & fd & F_SMALL)
+                && COUNT(F_POINTER) < 3
+                && COUNT(F_ASCII) < 3
+                && COUNT(F_SPREAD) >= 2)
+                out[count++] = (int64_t)(t + i);
+        }
+    }
+    return count;
+}
@@ -26,6 +26,7 @@ MEM_COMMIT = 0x1000
 PAGE_READWRITE = 0x04
 PAGE_EXECUTE_READWRITE = 0x40
 MAX_REGION_SIZE = 100 * 1024 * 1024  # 100 MB
+SPAN_MERGE_GAP = 4096  # read nearby patch sites in one ReadProcessMemory
 
 
 class MEMORY_BASIC_INFORMATION(ctypes.Structure):
@@ -147,22 +148,54 @@ def find_server_address_in_memory(pm: pymem.Pymem, server_ip: str = "87.98.220.2
     return results
 
 
-def patch_memory(pm: pymem.Pymem, address: int, old_data: bytes, new_data: bytes) -> bool:
-    """Patch a memory location, handling page protections."""
+def _write_with_protection(pm: pymem.Pymem, address: int, data: bytes) -> bool:
+    """Write data at address, making the range writable for the write.
+
+    The range's protection is restored afterwards if it could be changed.
+    Returns False (and logs) if the write failed.
+    """
     VirtualProtectEx = ctypes.windll.kernel32.VirtualProtectEx
     old_protect = wintypes.DWORD()
 
     # Make memory writable
-    if not VirtualProtectEx(
+    protected = VirtualProtectEx(
         pm.process_handle,
         ctypes.c_size_t(address),
-        len(new_data),
+        len(data),
         PAGE_EXECUTE_READWRITE,
         ctypes.byref(old_protect)
-    ):
+    )
+    if not protected:
         log.warning(f"Could not change memory protection at 0x{address:08X}")
         # Try anyway
 
+    try:
+        pm.write_bytes(address, data, len(data))
+        return True
+    except Exception as e:
+        log.error(f"Patch error at 0x{address:08X}: {e}")
+        return False
+    finally:
+        # Restore protection; old_protect is only valid if it was changed
+        if protected:
+            VirtualProtectEx(
+                pm.process_handle,
+                ctypes.c_size_t(address),
+                len(data),
+                old_protect.value,
+                ctypes.byref(old_protect)
+            )
+
+
+def _padded(new_data: bytes, size: int) -> bytes:
+    """new_data padded with nulls to size bytes (unchanged if already as long)."""
+    if len(new_data) < size:
+        return new_data + b'\x00' * (size - len(new_data))
+    return new_data
+
+
+def patch_memory(pm: pymem.Pymem, address: int, old_data: bytes, new_data: bytes) -> bool:
+    """Patch a memory location, handling page protections."""
     try:
         # Verify current content
         current = pm.read_bytes(address, len(old_data))
@@ -172,11 +205,8 @@ def patch_memory(pm: pymem.Pymem, address: int, old_data: bytes, new_data: bytes
             log.warning(f"  Found:    {current[:30]}...")
 
         # Write new data (pad with null if shorter)
-        write_data = new_data
-        if len(new_data) < len(old_data):
-            write_data = new_data + b'\x00' * (len(old_data) - len(new_data))
-
-        pm.write_bytes(address, write_data, len(write_data))
+        if not _write_with_protection(pm, address, _padded(new_data, len(old_data))):
+            return False
 
         # Verify
         verify = pm.read_bytes(address, len(new_data))
@@ -191,15 +221,85 @@ def patch_memory(pm: pymem.Pymem, address: int, old_data: bytes, new_data: bytes
         log.error(f"Patch error: {e}")
         return False
 
-    finally:
-        # Restore protection
-        VirtualProtectEx(
-            pm.process_handle,
-            ctypes.c_size_t(address),
-            len(new_data),
-            old_protect.value,
-            ctypes.byref(old_protect)
-        )
+
+def _read_span_bytes(pm: pymem.Pymem, spans: list[tuple[int, int]]) -> dict[int, bytes]:
+    """Read several (address, length) ranges, merging nearby ones into one read.
+
+    If a merged read fails (e.g. an unreadable page between two spans),
+    the spans of that group are read one by one instead. Returns
+    {address: bytes} for every span that could be read.
+    """
+    out = {}
+    if not spans:
+        return out
+    spans = sorted(spans)
+    group = [spans[0]]
+    groups = [group]
+    for addr, size in spans[1:]:
+        end = max(a + n for a, n in group)
+        if addr - end <= SPAN_MERGE_GAP:
+            group.append((addr, size))
+        else:
+            group = [(addr, size)]
+            groups.append(group)
+
+    for group in groups:
+        start = group[0][0]
+        end = max(a + n for a, n in group)
+        try:
+            data = pm.read_bytes(start, end - start)
+        except Exception as e:
+            if len(group) == 1:
+                log.warning(f"Could not read 0x{start:08X}-0x{end:08X}: {e}")
+                continue
+            for addr, size in group:
+                try:
+                    out[addr] = pm.read_bytes(addr, size)
+                except Exception as e:
+                    log.warning(f"Could not read 0x{addr:08X}: {e}")
+            continue
+        for addr, size in group:
+            out[addr] = data[addr - start:addr - start + size]
+    return out
+
+
+def patch_memory_bulk(pm: pymem.Pymem, locations: list[tuple[int, bytes]], new_data: bytes) -> int:
+    """Patch every (address, old_data) location with new_data.
+
+    Same result as calling patch_memory() per location, but the pre-write
+    check and the verification are each done with one read per cluster of
+    nearby addresses instead of two reads per location. Returns the number
+    of locations that verified.
+    """
+    if not locations:
+        return 0
+
+    current = _read_span_bytes(pm, [(addr, len(old)) for addr, old in locations])
+    to_write = []
+    for addr, old_data in locations:
+        found = current.get(addr)
+        if found is None:
+            # Like patch_memory(): a site that can't be read isn't written
+            log.warning(f"Could not read 0x{addr:08X}, not patching it")
+            continue
+        if found != old_data:
+            log.warning(f"Memory content doesn't match expected value at 0x{addr:08X}")
+            log.warning(f"  Expected: {old_data[:30]}...")
+            log.warning(f"  Found:    {found[:30]}...")
+        to_write.append((addr, old_data))
+
+    written = [addr for addr, old_data in to_write
+               if _write_with_protection(pm, addr, _padded(new_data, len(old_data)))]
+
+    verify = _read_span_bytes(pm, [(addr, len(new_data)) for addr in written])
+    patched = 0
+    for addr in written:
+        if verify.get(addr) == new_data:
+            log.info(f"Patched 0x{addr:08X}")
+            patched += 1
+        else:
+            log.error(f"Verification failed at 0x{addr:08X}")
+    return patched
 
 
 def main():
@@ -257,12 +357,9 @@ def main():
             patched_rsa += 1
 
     # Patch server IP to localhost
-    patched_ip = 0
     localhost = b"127.0.0.1"
-    for addr, old_ip in ip_locations:
-        log.info(f"Patching server IP at 0x{addr:08X}...")
-        if patch_memory(pm, addr, old_ip, localhost):
-            patched_ip += 1
+    log.info(f"Patching {len(ip_locations)} server IP location(s)...")
+    patched_ip = patch_memory_bulk(pm, ip_locations, localhost)
 
     log.info(f"=== Patching Summary ===")
     log.info(f"RSA keys patched: {patched_rsa}/{len(rsa_locations)}")
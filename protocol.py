@@ -162,6 +162,11 @@ class ServerOpcode(IntEnum):
     VIP_LOGOUT = 0xD4
 
 
+# Opcode value -> enum name, for logging without a try/except ValueError
+CLIENT_OPCODE_NAMES = {o.value: o.name for o in ClientOpcode}
+SERVER_OPCODE_NAMES = {o.value: o.name for o in ServerOpcode}
+
+
 # ============================================================
 # Directions
 # ============================================================
@@ -188,6 +193,19 @@ WALK_OPCODES = {
     Direction.NORTHWEST: ClientOpcode.WALK_NORTHWEST,
 }
 
+# Direction codes used inside the auto-walk (0x64) step list
+AUTOWALK_DIR_CODES = {
+    Direction.EAST: 1,
+    Direction.NORTHEAST: 2,
+    Direction.NORTH: 3,
+    Direction.NORTHWEST: 4,
+    Direction.WEST: 5,
+    Direction.SOUTHWEST: 6,
+    Direction.SOUTH: 7,
+    Direction.SOUTHEAST: 8,
+}
+AUTOWALK_MAX_STEPS = 255  # step count is a u8
+
 
 # ============================================================
 # Packet Reader/Writer
@@ -199,6 +217,11 @@ class PacketReader:
         self._data = data
         self._pos = 0
 
+    def reset(self, data: bytes, pos: int = 0):
+        """Point the reader at a new buffer at pos, so one instance can be reused."""
+        self._data = data
+        self._pos = pos
+
     @property
     def remaining(self) -> int:
         return len(self._data) - self._pos
@@ -293,7 +316,7 @@ def build_autowalk_packet(directions: list[Direction]) -> bytes:
     pw.write_u8(ClientOpcode.AUTO_WALK)
     pw.write_u8(len(directions))
     for d in directions:
-        pw.write_u8(int(d))
+        pw.write_u8(AUTOWALK_DIR_CODES[d])
     return pw.data
 
 
@@ -8,19 +8,123 @@ Handles TWO phases:
 """
 
 import asyncio
+import socket
 import struct
+import sys
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from crypto import (
-    rsa_decrypt, rsa_encrypt, xtea_decrypt, xtea_encrypt,
+    rsa_decrypt, rsa_encrypt, xtea_decrypt, xtea_encrypt, xtea_encrypt_into,
+    xtea_decrypt_packet, xtea_schedule,
     adler32_checksum, generate_proxy_rsa_keypair, get_default_rsa_key,
     DEFAULT_RSA_N, DEFAULT_RSA_E
 )
 from protocol import PacketReader, PacketWriter, ServerOpcode, ClientOpcode
-from constants import SERVER_IP_BYTES, SERVER_IP_STR
+from constants import SERVER_IP_BYTES, SERVER_IP_STR, LOCALHOST_IP_BYTES, LOCALHOST_IP_STR
 
 log = logging.getLogger("proxy")
 
+# Precompiled packers for the per-packet header/checksum fields
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_XTEA_KEYS = struct.Struct('<4I')
+
+# Login RSA modexp runs here so the event loop keeps relaying other sessions
+_RSA_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rsa")
+
+# Relay loops only await drain() once this much is buffered in the transport,
+# so bursts of small packets are written without a round-trip per packet
+DRAIN_HIGH_WATER = 64 * 1024
+
+# Kernel send/receive buffer size for proxied sockets — large enough that
+# a burst of map/creature packets never fills the window mid-relay
+SOCKET_BUFFER_SIZE = 1 << 20
+
+
+def _tune_socket(writer: asyncio.StreamWriter):
+    """Disable Nagle and size kernel buffers on a proxied connection.
+
+    Game packets are small and latency-sensitive (walks, injected actions),
+    so waiting for Nagle/delayed-ACK coalescing only adds lag.
+    """
+    sock = writer.get_extra_info('socket')
+    if sock is None:
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+    except OSError as e:
+        log.debug(f"Socket tuning failed: {e}")
+
+
+def install_fast_event_loop() -> bool:
+    """
+    Use uvloop as the asyncio event loop policy when it is available.
+
+    Must be called before the event loop is created. uvloop does not
+    support Windows, so this is a no-op there and whenever uvloop is not
+    installed; returns True if uvloop was installed.
+    """
+    if sys.platform == "win32":
+        return False
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    log.info("Using uvloop event loop")
+    return True
+
+
+class PacketStream:
+    """
+    Length-prefixed OT packet parser over an asyncio StreamReader.
+
+    Reads whatever the socket has (up to chunk_size) in a single await and
+    parses packets in place by advancing an offset into that chunk, so
+    pipelined packets arriving in one TCP segment cost neither an extra
+    await nor a copy. Packets are returned as memoryview slices of the
+    (immutable) received chunk; only a packet split across reads is copied
+    once to stitch it together.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, chunk_size: int = 65536):
+        self._reader = reader
+        self._chunk_size = chunk_size
+        self._view = memoryview(b"")
+        self._pos = 0
+
+    async def read_packet(self) -> memoryview | None:
+        """Return the next packet body, or None on EOF/invalid length."""
+        try:
+            while True:
+                view = self._view
+                pos = self._pos
+                avail = len(view) - pos
+                if avail >= 2:
+                    length = view[pos] | (view[pos + 1] << 8)
+                    if length == 0:
+                        return None
+                    end = pos + 2 + length
+                    if end <= len(view):
+                        self._pos = end
+                        return view[pos + 2:end]
+                    # Split packet: length is known, read exactly the rest
+                    rest = await self._reader.readexactly(end - len(view))
+                    self._view = memoryview(b"")
+                    self._pos = 0
+                    return memoryview(view[pos + 2:].tobytes() + rest)
+
+                chunk = await self._reader.read(self._chunk_size)
+                if not chunk:
+                    return None
+                self._view = memoryview(view[pos:].tobytes() + chunk if avail else chunk)
+                self._pos = 0
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+
 
 class OTProxy:
     """
@@ -29,12 +133,20 @@ class OTProxy:
     Handles both login and game connections.
     """
 
+    # Which RSA key ("DEFAULT"/"PROXY") last decrypted a login block; shared
+    # by the login and game proxies so reconnects try the right key first.
+    _last_rsa_key_name = "DEFAULT"
+
     def __init__(self, server_host: str, server_port: int, listen_port: int,
-                 is_login_proxy: bool = False, shared_rsa_key=None):
+                 is_login_proxy: bool = False, shared_rsa_key=None,
+                 passthrough: bool = False):
         self.server_host = server_host
         self.server_port = server_port
         self.listen_port = listen_port
         self.is_login_proxy = is_login_proxy
+        # Game sessions relay raw bytes without parsing packets: no XTEA
+        # capture, no packet callbacks, and inject_to_* raise
+        self.passthrough = passthrough
 
         # Use the default OTClient RSA key - we know the private key!
         # No need to patch the client, just decrypt with the known key.
@@ -43,11 +155,13 @@ class OTProxy:
         # Lazy-init proxy RSA key only if needed (keygen is expensive)
         self._shared_rsa_key = shared_rsa_key
         self._proxy_rsa_key = None
+        self._proxy_pubkey_str = None
         self.server_rsa_n = DEFAULT_RSA_N
         self.server_rsa_e = DEFAULT_RSA_E
 
         # Session state
-        self.xtea_keys = None
+        self._xtea_keys = None
+        self._xtea_schedule = None
         self.logged_in = False
 
         # Connection handles
@@ -57,12 +171,20 @@ class OTProxy:
         self.server_writer = None
 
         # Callbacks for bot
-        self.on_server_packet = None          # legacy — only bot.py/start.py use it
+        self._on_server_packet = None         # legacy — only bot.py/start.py use it
         self._client_packet_callbacks = []    # list of (opcode, reader) callables
         self.on_login_success = None
         self.on_game_disconnected = None
-        self.on_raw_server_data = None  # Called with full decrypted bytes
-        self._inject_queue = asyncio.Queue()
+        self._on_raw_server_data = None       # Called with full decrypted bytes
+        # True when any server-packet listener is attached; checked per packet
+        # so the relay skips XTEA decryption entirely when nobody is listening.
+        self._needs_decrypt = False
+        # Reused for every packet instead of allocating a reader each time
+        self._server_pr = PacketReader(b"")
+        self._client_pr = PacketReader(b"")
+        # One queue per direction so consumers write straight to their socket
+        self._inject_to_server = asyncio.Queue()
+        self._inject_to_client = asyncio.Queue()
 
         # Stats
         self.packets_from_server = 0
@@ -105,6 +227,35 @@ class OTProxy:
         else:
             self._client_packet_callbacks.append(callback)
 
+    # ── Server packet listeners ────────────────────────────────────
+    @property
+    def on_server_packet(self):
+        return self._on_server_packet
+
+    @on_server_packet.setter
+    def on_server_packet(self, callback):
+        self._on_server_packet = callback
+        self._needs_decrypt = callback is not None or self._on_raw_server_data is not None
+
+    @property
+    def on_raw_server_data(self):
+        return self._on_raw_server_data
+
+    @on_raw_server_data.setter
+    def on_raw_server_data(self, callback):
+        self._on_raw_server_data = callback
+        self._needs_decrypt = callback is not None or self._on_server_packet is not None
+
+    @property
+    def xtea_keys(self):
+        return self._xtea_keys
+
+    @xtea_keys.setter
+    def xtea_keys(self, keys):
+        # Round-key schedule is fixed per session — derive it once, not per packet
+        self._xtea_keys = keys
+        self._xtea_schedule = xtea_schedule(keys) if keys is not None else None
+
     @property
     def proxy_rsa_key(self):
         if self._proxy_rsa_key is None:
@@ -116,7 +267,9 @@ class OTProxy:
         server = await asyncio.start_server(
             self._handle_client_connection,
             '127.0.0.1',
-            self.listen_port
+            self.listen_port,
+            reuse_address=True,
+            backlog=16,
         )
         self._server = server
         self._ts_listening = time.time()
@@ -161,6 +314,7 @@ class OTProxy:
 
         self.client_reader = reader
         self.client_writer = writer
+        _tune_socket(writer)
         self._ts_client_connected = time.time()
         self.logged_in = False
         self.xtea_keys = None
@@ -170,6 +324,7 @@ class OTProxy:
                 self.server_host, self.server_port
             )
             self._ts_server_connected = time.time()
+            _tune_socket(self.server_writer)
             log.info(f"[{mode}] Connected to server {self.server_host}:{self.server_port}")
         except Exception as e:
             log.error(f"[{mode}] Failed to connect to server: {e}")
@@ -183,6 +338,9 @@ class OTProxy:
         try:
             if self.is_login_proxy:
                 await self._handle_login_session()
+            elif self.passthrough:
+                log.info(f"[{mode}] Relaying in pass-through mode")
+                await self._run_passthrough_loop()
             else:
                 await self._run_relay_loop()
         except asyncio.CancelledError:
@@ -217,25 +375,25 @@ class OTProxy:
         2. Server sends character list -> we decrypt, modify game server IP, re-encrypt, forward
         """
         # Step 1: Client login packet
-        raw = await self._read_packet(self.client_reader)
+        raw = await PacketStream(self.client_reader).read_packet()
         if raw is None:
             log.error("[LOGIN] No login packet received")
             return
 
         log.info(f"[LOGIN] Received login packet ({len(raw)} bytes)")
 
-        processed = self._process_login_packet(raw)
+        processed = await self._process_login_packet(raw)
         if processed is not None:
-            self.server_writer.write(self._wrap_packet(processed))
+            self.server_writer.writelines(self._wrap_packet(processed))
             await self.server_writer.drain()
             log.info("[LOGIN] Forwarded login packet to server")
         else:
-            self.server_writer.write(self._wrap_packet(raw))
+            self.server_writer.writelines(self._wrap_packet(raw))
             await self.server_writer.drain()
             log.warning("[LOGIN] Could not process login packet, forwarded as-is")
 
         # Step 2: Server response (character list)
-        response = await self._read_packet(self.server_reader)
+        response = await PacketStream(self.server_reader).read_packet()
         if response is None:
             log.error("[LOGIN] No response from server")
             return
@@ -245,17 +403,17 @@ class OTProxy:
         if self.xtea_keys:
             modified = self._modify_login_response(response)
             if modified:
-                self.client_writer.write(self._wrap_packet(modified))
+                self.client_writer.writelines(self._wrap_packet(modified))
                 await self.client_writer.drain()
                 log.info("[LOGIN] Forwarded modified character list (game IP -> 127.0.0.1)")
                 return
 
         # Forward as-is if we couldn't modify
-        self.client_writer.write(self._wrap_packet(response))
+        self.client_writer.writelines(self._wrap_packet(response))
         await self.client_writer.drain()
         log.info("[LOGIN] Forwarded response as-is")
 
-    def _modify_login_response(self, data: bytes) -> bytes | None:
+    def _modify_login_response(self, data: bytes) -> bytearray | None:
         """
         Decrypt the login response, modify game server IP to localhost,
         re-encrypt and return.
@@ -263,21 +421,22 @@ class OTProxy:
         try:
             # Detect checksum
             has_checksum = False
+            view = memoryview(data)
             offset = 0
             if len(data) > 4:
-                checksum = struct.unpack_from('<I', data, 0)[0]
-                computed = adler32_checksum(data[4:])
+                checksum = _U32.unpack_from(data, 0)[0]
+                computed = adler32_checksum(view[4:])
                 if checksum == computed:
                     has_checksum = True
                     offset = 4
 
-            encrypted = data[offset:]
+            encrypted = view[offset:]
             if len(encrypted) % 8 != 0:
                 log.warning("[LOGIN] Response not aligned to 8 bytes")
                 return None
 
-            decrypted = xtea_decrypt(encrypted, self.xtea_keys)
-            inner_len = struct.unpack_from('<H', decrypted, 0)[0]
+            decrypted = xtea_decrypt(encrypted, self.xtea_keys, self._xtea_schedule)
+            inner_len = _U16.unpack_from(decrypted, 0)[0]
             payload = decrypted[2:2 + inner_len]
 
             log.info(f"[LOGIN] Decrypted response: {inner_len} bytes, first byte=0x{payload[0]:02X}")
@@ -285,37 +444,15 @@ class OTProxy:
             # Replace server IP in the response
             # The character list contains IP addresses as 4-byte values (packed IP)
             # and also as strings in some protocol versions
-            server_ip_bytes = SERVER_IP_BYTES
-            localhost_bytes = bytes([127, 0, 0, 1])
-
-            # Also try string replacement
-            server_ip_str = SERVER_IP_STR
-            localhost_str = b"127.0.0.1" + b"\x00" * max(0, len(SERVER_IP_STR) - 9)
-
-            modified_payload = bytearray(payload)
-            replaced = False
-
-            # Replace packed IP (4 bytes)
-            idx = 0
-            while True:
-                idx = modified_payload.find(server_ip_bytes, idx)
-                if idx == -1:
-                    break
-                modified_payload[idx:idx + 4] = localhost_bytes
-                log.info(f"[LOGIN] Replaced packed IP at offset {idx}")
-                replaced = True
-                idx += 4
-
-            # Replace string IP
-            idx = 0
-            while True:
-                idx = modified_payload.find(server_ip_str, idx)
-                if idx == -1:
-                    break
-                modified_payload[idx:idx + len(server_ip_str)] = localhost_str[:len(server_ip_str)]
-                log.info(f"[LOGIN] Replaced string IP at offset {idx}")
-                replaced = True
-                idx += len(server_ip_str)
+            packed_count = payload.count(SERVER_IP_BYTES)
+            modified_payload = payload.replace(SERVER_IP_BYTES, LOCALHOST_IP_BYTES)
+            str_count = modified_payload.count(SERVER_IP_STR)
+            modified_payload = modified_payload.replace(SERVER_IP_STR, LOCALHOST_IP_STR)
+            replaced = bool(packed_count or str_count)
+            if packed_count:
+                log.info(f"[LOGIN] Replaced {packed_count} packed IP occurrence(s)")
+            if str_count:
+                log.info(f"[LOGIN] Replaced {str_count} string IP occurrence(s)")
 
             if not replaced:
                 log.warning("[LOGIN] No server IP found in character list to replace!")
@@ -323,48 +460,46 @@ class OTProxy:
                 # Try to log the raw payload for debugging
                 log.debug(f"[LOGIN] Payload hex: {payload.hex()}")
 
-            # Re-encrypt
-            new_inner = struct.pack('<H', len(modified_payload)) + bytes(modified_payload)
-            # Pad to match original
-            if len(new_inner) < len(decrypted):
-                new_inner = new_inner + decrypted[len(new_inner):]
+            # Re-encrypt in one buffer: [checksum][u16 len + payload + original
+            # padding], encrypted in place, checksum filled in last
+            new_len = len(modified_payload)
+            body_len = max(len(decrypted), (2 + new_len + 7) & ~7)
+            out = bytearray(offset + body_len)
+            _U16.pack_into(out, offset, new_len)
+            end = offset + 2 + new_len
+            out[offset + 2:end] = modified_payload
+            if end < offset + len(decrypted):
+                out[end:offset + len(decrypted)] = decrypted[2 + new_len:]
 
-            re_encrypted = xtea_encrypt(new_inner, self.xtea_keys)
+            xtea_encrypt_into(out, self.xtea_keys, offset, body_len, self._xtea_schedule)
 
             if has_checksum:
-                new_checksum = adler32_checksum(re_encrypted)
-                return struct.pack('<I', new_checksum) + re_encrypted
-            else:
-                return re_encrypted
+                _U32.pack_into(out, 0, adler32_checksum(memoryview(out)[4:]))
+            return out
 
         except Exception as e:
             log.error(f"[LOGIN] Error modifying response: {e}")
             log.debug("Login response modification traceback:", exc_info=True)
             return None
 
-    async def _read_packet(self, reader: asyncio.StreamReader) -> bytes | None:
-        """Read a full OT protocol packet (length-prefixed)."""
-        try:
-            header = await reader.readexactly(2)
-            length = struct.unpack('<H', header)[0]
-            if length == 0 or length > 65535:
-                return None
-            data = await reader.readexactly(length)
-            return data
-        except (asyncio.IncompleteReadError, ConnectionError):
-            return None
+    def _wrap_packet(self, data: bytes) -> tuple[bytes, bytes]:
+        """Return (length header, data) for writer.writelines().
 
-    def _wrap_packet(self, data: bytes) -> bytes:
-        """Wrap data with length header."""
-        return struct.pack('<H', len(data)) + data
+        Passing the two buffers separately avoids concatenating a copy of
+        every relayed packet just to prepend two bytes.
+        """
+        return _U16.pack(len(data)), data
 
     async def _run_relay_loop(self):
-        """Supervised relay loop. Creates 3 relay tasks and monitors them."""
+        """Supervised relay loop. Creates 2 relay + 2 inject tasks and monitors them."""
         while True:
             client_task = asyncio.create_task(self._relay_client_to_server())
             server_task = asyncio.create_task(self._relay_server_to_client())
-            inject_task = asyncio.create_task(self._process_inject_queue())
-            tasks = {client_task, server_task, inject_task}
+            inject_server_task = asyncio.create_task(
+                self._inject_consumer(self._inject_to_server, 'server_writer', 'server'))
+            inject_client_task = asyncio.create_task(
+                self._inject_consumer(self._inject_to_client, 'client_writer', 'client'))
+            tasks = {client_task, server_task, inject_server_task, inject_client_task}
 
             try:
                 done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
@@ -388,10 +523,46 @@ class OTProxy:
                     pass
             break
 
+    async def _run_passthrough_loop(self):
+        """Relay raw byte chunks in both directions without packet framing.
+
+        Used for game sessions when the proxy was created with
+        passthrough=True. Nothing is parsed, so XTEA keys are never captured.
+        """
+        tasks = {
+            asyncio.create_task(self._relay_raw(self.client_reader, self.server_writer)),
+            asyncio.create_task(self._relay_raw(self.server_reader, self.client_writer)),
+        }
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for t in tasks:
+                t.cancel()
+            for t in tasks:
+                try:
+                    await t
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+    @staticmethod
+    async def _relay_raw(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Copy bytes from reader to writer until EOF."""
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                if writer.transport.get_write_buffer_size() > DRAIN_HIGH_WATER:
+                    await writer.drain()
+        except ConnectionError:
+            pass
+
     async def _relay_client_to_server(self):
         """Relay packets from client to server, intercepting login."""
+        stream = PacketStream(self.client_reader)
         while True:
-            raw = await self._read_packet(self.client_reader)
+            raw = await stream.read_packet()
             if raw is None:
                 log.info("Client disconnected")
                 break
@@ -404,22 +575,22 @@ class OTProxy:
 
             if not self.logged_in:
                 # Login phase: extract XTEA keys
-                processed = self._process_login_packet(raw)
-                if processed is not None:
-                    self.server_writer.write(self._wrap_packet(processed))
-                    await self.server_writer.drain()
-                else:
-                    self.server_writer.write(self._wrap_packet(raw))
-                    await self.server_writer.drain()
+                processed = await self._process_login_packet(raw)
+                if processed is None:
+                    processed = raw
             else:
                 processed = self._process_client_game_packet(raw)
-                self.server_writer.write(self._wrap_packet(processed))
-                await self.server_writer.drain()
+
+            writer = self.server_writer
+            writer.writelines(self._wrap_packet(processed))
+            if writer.transport.get_write_buffer_size() > DRAIN_HIGH_WATER:
+                await writer.drain()
 
     async def _relay_server_to_client(self):
         """Relay packets from server to client."""
+        stream = PacketStream(self.server_reader)
         while True:
-            raw = await self._read_packet(self.server_reader)
+            raw = await stream.read_packet()
             if raw is None:
                 log.info("Server disconnected")
                 break
@@ -439,31 +610,47 @@ class OTProxy:
             if self.client_writer is None:
                 log.warning("Client writer gone, stopping server relay")
                 break
-            self.client_writer.write(self._wrap_packet(raw))
-            await self.client_writer.drain()
+            writer = self.client_writer
+            writer.writelines(self._wrap_packet(raw))
+            if writer.transport.get_write_buffer_size() > DRAIN_HIGH_WATER:
+                await writer.drain()
 
             # Now decrypt and run callbacks (can be slow — pure-Python XTEA + scan)
-            if self.logged_in and (self.on_server_packet or self.on_raw_server_data):
+            if self.logged_in and self._needs_decrypt:
                 try:
                     decrypted = self._decrypt_game_packet(raw)
                     if decrypted:
-                        if self.on_raw_server_data:
+                        if self._on_raw_server_data:
                             try:
-                                self.on_raw_server_data(decrypted)
+                                self._on_raw_server_data(decrypted)
                             except Exception:
                                 pass
-                        if self.on_server_packet:
-                            pr = PacketReader(decrypted)
-                            if pr.remaining > 0:
-                                opcode = pr.read_u8()
-                                try:
-                                    self.on_server_packet(opcode, pr)
-                                except Exception as e:
-                                    log.debug(f"Server packet callback error: {e}")
+                        if self._on_server_packet:
+                            pr = self._server_pr
+                            pr.reset(decrypted, 1)
+                            try:
+                                self._on_server_packet(decrypted[0], pr)
+                            except Exception as e:
+                                log.debug(f"Server packet callback error: {e}")
                 except Exception:
                     pass
 
-    def _process_login_packet(self, data: bytes) -> bytes | None:
+    def _login_rsa_keys(self):
+        """Yield (name, key) pairs to try on a login packet.
+
+        The key that last decrypted a login block (remembered across proxies
+        and reconnects) is tried first, the default OTClient key otherwise.
+        Generator so the expensive proxy keypair is only created when it is
+        actually tried.
+        """
+        if OTProxy._last_rsa_key_name == "PROXY":
+            yield "PROXY", self.proxy_rsa_key
+            yield "DEFAULT", self.default_rsa_key
+        else:
+            yield "DEFAULT", self.default_rsa_key
+            yield "PROXY", self.proxy_rsa_key
+
+    async def _process_login_packet(self, data: bytes) -> bytes | None:
         """
         Process a login packet from the client.
         Extract XTEA keys from the RSA-encrypted block.
@@ -471,12 +658,15 @@ class OTProxy:
         Since the client uses the default OTClient RSA key and we know the
         private key, we just decrypt to extract XTEA keys and forward as-is.
         No re-encryption needed - the server has the same key.
+
+        The RSA modexp runs in _RSA_POOL so a login does not stall the relay
+        and inject tasks of other sessions on the event loop.
         """
         try:
             has_checksum = False
             if len(data) > 4:
-                checksum = struct.unpack_from('<I', data, 0)[0]
-                computed = adler32_checksum(data[4:])
+                checksum = _U32.unpack_from(data, 0)[0]
+                computed = adler32_checksum(memoryview(data)[4:])
                 if checksum == computed:
                     has_checksum = True
 
@@ -492,45 +682,37 @@ class OTProxy:
                 return data  # Forward as-is
 
             # Try to find and decrypt the RSA block using the DEFAULT key
-            # (the client encrypted with the default OTClient RSA public key)
-            keys_to_try = [self.default_rsa_key, self.proxy_rsa_key]
-
-            for key in keys_to_try:
-                # Try the last 128 bytes first (most common RSA block position
-                # in OT login packets), then fall back to brute-force iteration
-                last_offset = len(data) - rsa_block_size
-                offsets_to_try = [last_offset] if last_offset > offset else []
-                offsets_to_try += [
-                    o for o in range(offset + 1, len(data) - rsa_block_size + 1)
-                    if o != last_offset
-                ]
-
-                for try_offset in offsets_to_try:
-                    rsa_block = data[try_offset:try_offset + rsa_block_size]
-                    try:
-                        decrypted = rsa_decrypt(rsa_block, key)
-                        if decrypted[0] == 0x00:
-                            key_name = "DEFAULT" if key == self.default_rsa_key else "PROXY"
-                            log.info(f"RSA block found at offset {try_offset} (using {key_name} key)")
+            # (the client encrypted with the default OTClient RSA public key).
+            # The proxy key is only generated if the default key fails.
+            # The RSA block is always the last 128 bytes of an OT login
+            # packet. Only that offset is tried (once per key) — brute-forcing
+            # every offset costs one modexp per byte on malformed packets.
+            rsa_offset = len(data) - rsa_block_size
+            rsa_block = bytes(data[rsa_offset:])
+            loop = asyncio.get_running_loop()
+            for key_name, key in self._login_rsa_keys():
+                try:
+                    decrypted = await loop.run_in_executor(_RSA_POOL, rsa_decrypt, rsa_block, key)
+                except Exception:
+                    continue
+                if decrypted[0] != 0x00:
+                    continue
 
-                            xtea_data = decrypted[1:17]
-                            self.xtea_keys = struct.unpack('<4I', xtea_data)
-                            self._ts_xtea_captured = time.time()
-                            log.info(f"XTEA keys: {' '.join(f'{k:08X}' for k in self.xtea_keys)}")
+                log.info(f"RSA block found at offset {rsa_offset} (using {key_name} key)")
+                OTProxy._last_rsa_key_name = key_name
 
-                            # Log additional info from the decrypted block
-                            try:
-                                pr = PacketReader(decrypted[17:])
-                                gm_flag = decrypted[17] if len(decrypted) > 17 else 0
-                                log.debug(f"GM flag: {gm_flag}")
-                            except Exception:
-                                pass
+                xtea_data = decrypted[1:17]
+                self.xtea_keys = _XTEA_KEYS.unpack(xtea_data)
+                self._ts_xtea_captured = time.time()
+                log.info(f"XTEA keys: {' '.join(f'{k:08X}' for k in self.xtea_keys)}")
 
-                            # Forward the original packet as-is
-                            # (server can decrypt it with the same RSA private key)
-                            return data
-                    except Exception:
-                        continue
+                # Log additional info from the decrypted block
+                gm_flag = decrypted[17] if len(decrypted) > 17 else 0
+                log.debug(f"GM flag: {gm_flag}")
+
+                # Forward the original packet as-is
+                # (server can decrypt it with the same RSA private key)
+                return data
 
             log.warning("Could not find RSA block in login packet!")
             log.warning(f"Packet hex (first 32 bytes): {data[:32].hex()}")
@@ -546,91 +728,115 @@ class OTProxy:
             return None
 
         try:
-            offset = 0
-            if len(data) > 4:
-                checksum = struct.unpack_from('<I', data, 0)[0]
-                computed = adler32_checksum(data[4:])
-                if checksum == computed:
-                    offset = 4
-
-            encrypted = data[offset:]
-            if len(encrypted) % 8 != 0:
-                return None
-
-            decrypted = xtea_decrypt(encrypted, self.xtea_keys)
-            inner_len = struct.unpack_from('<H', decrypted, 0)[0]
-            if inner_len > len(decrypted) - 2:
-                return None
-
-            return decrypted[2:2 + inner_len]
+            return xtea_decrypt_packet(data, self.xtea_keys, self._xtea_schedule)
         except Exception:
             return None
 
-    def _encrypt_game_packet(self, payload: bytes) -> bytes:
-        """Encrypt a game packet with XTEA for sending to server."""
-        data = struct.pack('<H', len(payload)) + payload
-        encrypted = xtea_encrypt(data, self.xtea_keys)
-        checksum = adler32_checksum(encrypted)
-        return struct.pack('<I', checksum) + encrypted
+    def _encrypt_game_packet(self, payload: bytes) -> bytearray:
+        """Encrypt a game packet with XTEA for sending to server.
+
+        Builds [checksum][u16 len + payload + pad] in one preallocated buffer
+        and encrypts the body in place.
+        """
+        n = len(payload)
+        body_len = (n + 2 + 7) & ~7
+        buf = bytearray(4 + body_len)
+        _U16.pack_into(buf, 4, n)
+        buf[6:6 + n] = payload
+        xtea_encrypt_into(buf, self.xtea_keys, 4, body_len, self._xtea_schedule)
+        _U32.pack_into(buf, 0, adler32_checksum(memoryview(buf)[4:]))
+        return buf
 
     def _process_client_game_packet(self, data: bytes) -> bytes:
         """Process a game packet from the client (inspect, forward)."""
-        if self._client_packet_callbacks and self.xtea_keys:
-            try:
-                decrypted = self._decrypt_game_packet(data)
-                if decrypted:
-                    for cb in list(self._client_packet_callbacks):
-                        try:
-                            pr = PacketReader(decrypted)
-                            if pr.remaining > 0:
-                                opcode = pr.read_u8()
-                                cb(opcode, pr)
-                        except Exception as e:
-                            log.debug(f"Client packet callback error: {e}")
-            except Exception:
-                pass
+        # Nothing to inspect — forward without touching XTEA
+        if not self._client_packet_callbacks or self.xtea_keys is None:
+            return data
+
+        try:
+            decrypted = self._decrypt_game_packet(data)
+            if decrypted:
+                opcode = decrypted[0]
+                pr = self._client_pr
+                for cb in list(self._client_packet_callbacks):
+                    try:
+                        # Rewind past the opcode for each callback
+                        pr.reset(decrypted, 1)
+                        cb(opcode, pr)
+                    except Exception as e:
+                        log.debug(f"Client packet callback error: {e}")
+        except Exception:
+            pass
 
         return data
 
-    async def inject_to_server(self, payload: bytes):
-        """Inject a packet to the game server."""
+    def _check_can_inject(self):
+        """Raise if this proxy can never send injected packets."""
+        if self.passthrough:
+            raise RuntimeError("Cannot inject: proxy relays in pass-through mode")
+
+    def inject_to_server_nowait(self, payload: bytes):
+        """Queue a packet for the game server without awaiting.
+
+        Framing, encryption and the (batched) write happen in the inject
+        consumer task; must be called from the event loop thread.
+        """
+        self._check_can_inject()
         if not self.logged_in or self.xtea_keys is None:
             log.warning("Cannot inject: not logged in yet")
             return
-        await self._inject_queue.put(('server', payload))
+        self._inject_to_server.put_nowait(payload)
 
-    async def inject_to_client(self, payload: bytes):
-        """Inject a packet to the client."""
+    def inject_to_client_nowait(self, payload: bytes):
+        """Queue a packet for the client without awaiting."""
+        self._check_can_inject()
         if not self.logged_in or self.xtea_keys is None:
             log.warning("Cannot inject: not logged in yet")
             return
-        await self._inject_queue.put(('client', payload))
+        self._inject_to_client.put_nowait(payload)
 
-    async def _process_inject_queue(self):
-        """Process queued packet injections."""
+    async def inject_to_server(self, payload: bytes):
+        """Inject a packet to the game server."""
+        self.inject_to_server_nowait(payload)
+
+    async def inject_to_client(self, payload: bytes):
+        """Inject a packet to the client."""
+        self.inject_to_client_nowait(payload)
+
+    async def _inject_consumer(self, queue: asyncio.Queue, writer_attr: str, target: str):
+        """Encrypt and write queued injections for one direction.
+
+        Everything already queued when the consumer wakes up is framed and
+        handed to the transport in a single writelines() call, so packets
+        injected within the same loop tick share one flush.
+        """
         while True:
-            target, payload = await self._inject_queue.get()
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
 
             try:
-                encrypted = self._encrypt_game_packet(payload)
-                packet = self._wrap_packet(encrypted)
-
-                if target == 'server' and self.server_writer:
-                    self.server_writer.write(packet)
-                    await self.server_writer.drain()
-                    log.info(f"Injected to server: opcode=0x{payload[0]:02X} len={len(payload)}B")
-                elif target == 'client' and self.client_writer:
-                    self.client_writer.write(packet)
-                    await self.client_writer.drain()
-                    log.info(f"Injected to client: opcode=0x{payload[0]:02X} len={len(payload)}B")
-                else:
-                    log.warning(f"Inject DROPPED: target={target} "
+                writer = getattr(self, writer_attr)
+                if writer is None:
+                    log.warning(f"Inject DROPPED: target={target} count={len(batch)} "
                                 f"server_writer={self.server_writer is not None} "
                                 f"client_writer={self.client_writer is not None}")
+                    continue
+
+                buffers = []
+                for payload in batch:
+                    buffers.extend(self._wrap_packet(self._encrypt_game_packet(payload)))
+                writer.writelines(buffers)
+                if writer.transport.get_write_buffer_size() > DRAIN_HIGH_WATER:
+                    await writer.drain()
+                for payload in batch:
+                    log.info(f"Injected to {target}: opcode=0x{payload[0]:02X} len={len(payload)}B")
             except Exception as e:
                 log.error(f"Injection error: {e}")
 
     def get_proxy_rsa_public_key(self) -> str:
         """Get the proxy's RSA public key as a decimal string."""
-        return str(self.proxy_rsa_key.n)
+        if self._proxy_pubkey_str is None:
+            self._proxy_pubkey_str = str(self.proxy_rsa_key.n)
+        return self._proxy_pubkey_str
 
@@ -2,11 +2,11 @@
 DBVictory Bot Launcher
 
 Steps:
-1. Generates RSA key pair for the proxy
-2. Starts login proxy (port 7171) and game proxy (port 7172)
-3. Patches the running game client's memory (RSA key + server IP -> 127.0.0.1)
-4. You login in the game client - traffic goes through our proxy
-5. Bot CLI becomes available after login
+1. Starts login proxy (port 7171) and game proxy (port 7172), which decrypt
+   logins with the well-known default OTClient RSA key
+2. Patches the running game client's memory (server IP -> 127.0.0.1)
+3. You login in the game client - traffic goes through our proxy
+4. Bot CLI becomes available after login
 
 IMPORTANT: Run this BEFORE you login! The client should be at the login screen.
 Close the game if you're already logged in, restart it, then run this script.
@@ -16,16 +16,18 @@ import asyncio
 import sys
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from proxy import OTProxy
+from proxy import OTProxy, install_fast_event_loop
 from protocol import (
-    Direction, ClientOpcode, ServerOpcode, PacketReader,
+    Direction, PacketReader, CLIENT_OPCODE_NAMES, SERVER_OPCODE_NAMES,
     build_walk_packet, build_say_packet, build_stop_walk_packet,
     build_turn_packet, build_attack_packet, build_follow_packet,
+    build_autowalk_packet, AUTOWALK_MAX_STEPS,
 )
-from crypto import get_default_rsa_key
 
 from constants import SERVER_HOST, LOGIN_PORT, GAME_PORT
 
@@ -36,6 +38,27 @@ logging.basicConfig(
 )
 log = logging.getLogger("launcher")
 
+# Per-packet trace. Kept off the root handler so enabling it doesn't pay
+# for an asctime strftime on every packet.
+packet_log = logging.getLogger("launcher.packets")
+packet_log.propagate = False
+_packet_handler = logging.StreamHandler(sys.stderr)
+_packet_handler.setFormatter(logging.Formatter('%(relativeCreated)d %(message)s'))
+packet_log.addHandler(_packet_handler)
+
+# Command direction names -> protocol directions
+_DIR8 = {
+    'n': Direction.NORTH, 's': Direction.SOUTH,
+    'e': Direction.EAST, 'w': Direction.WEST,
+    'ne': Direction.NORTHEAST, 'se': Direction.SOUTHEAST,
+    'sw': Direction.SOUTHWEST, 'nw': Direction.NORTHWEST,
+}
+_DIR4 = {'n': Direction.NORTH, 's': Direction.SOUTH,
+         'e': Direction.EAST, 'w': Direction.WEST}
+
+# Stop-walk has no arguments, so its packet is a constant
+_STOP_PKT = build_stop_walk_packet()
+
 
 class BotController:
     """Bot with CLI commands."""
@@ -44,50 +67,62 @@ class BotController:
         self.proxy = game_proxy
         self.ready = False
         self._auto_task = None
+        # Walk packets never change, build each direction's once
+        self._walk_pkt_cache = {k: build_walk_packet(d) for k, d in _DIR8.items()}
 
     async def walk(self, direction: str, steps: int = 1):
-        dir_map = {
-            'n': Direction.NORTH, 's': Direction.SOUTH,
-            'e': Direction.EAST, 'w': Direction.WEST,
-            'ne': Direction.NORTHEAST, 'se': Direction.SOUTHEAST,
-            'sw': Direction.SOUTHWEST, 'nw': Direction.NORTHWEST,
-        }
-        d = dir_map.get(direction.lower())
-        if d is None:
+        pkt = self._walk_pkt_cache.get(direction.lower())
+        if pkt is None:
             print(f"Unknown direction: {direction}")
             return
+        if 1 < steps <= AUTOWALK_MAX_STEPS:
+            # One auto-walk packet; the server paces the steps itself
+            path = [_DIR8[direction.lower()]] * steps
+            self.proxy.inject_to_server_nowait(build_autowalk_packet(path))
+            return
         for i in range(steps):
-            await self.proxy.inject_to_server(build_walk_packet(d))
+            self.proxy.inject_to_server_nowait(pkt)
             if steps > 1:
                 await asyncio.sleep(0.3)
 
     async def turn(self, direction: str):
-        dir_map = {'n': Direction.NORTH, 's': Direction.SOUTH,
-                    'e': Direction.EAST, 'w': Direction.WEST}
-        d = dir_map.get(direction.lower())
+        d = _DIR4.get(direction.lower())
         if d:
-            await self.proxy.inject_to_server(build_turn_packet(d))
+            self.proxy.inject_to_server_nowait(build_turn_packet(d))
 
     async def say(self, text: str):
-        await self.proxy.inject_to_server(build_say_packet(text))
+        self.proxy.inject_to_server_nowait(build_say_packet(text))
 
     async def attack(self, cid: int):
-        await self.proxy.inject_to_server(build_attack_packet(cid))
+        self.proxy.inject_to_server_nowait(build_attack_packet(cid))
 
     async def follow(self, cid: int):
-        await self.proxy.inject_to_server(build_follow_packet(cid))
+        self.proxy.inject_to_server_nowait(build_follow_packet(cid))
 
     async def stop(self):
-        await self.proxy.inject_to_server(build_stop_walk_packet())
+        self.proxy.inject_to_server_nowait(_STOP_PKT)
 
     async def autowalk(self, direction: str, steps: int = 100, delay: float = 0.5):
         if self._auto_task:
             self._auto_task.cancel()
 
+        pkt = self._walk_pkt_cache.get(direction.lower())
+        if pkt is None:
+            print(f"Unknown direction: {direction}")
+            return
+
         async def _loop():
+            # Sleep to a deadline rather than a fixed delay, so the time
+            # spent injecting doesn't add drift to the step cadence.
+            loop = asyncio.get_running_loop()
+            inject = self.proxy.inject_to_server_nowait
+            sleep = asyncio.sleep
+            now = loop.time
+            deadline = now()
             for _ in range(steps):
-                await self.walk(direction)
-                await asyncio.sleep(delay)
+                inject(pkt)
+                deadline += delay
+                await sleep(max(0.0, deadline - now()))
 
         self._auto_task = asyncio.create_task(_loop())
 
@@ -98,11 +133,84 @@ class BotController:
             await self.stop()
 
 
-async def cli_loop(bot: BotController):
-    """Interactive command line."""
-    loop = asyncio.get_event_loop()
+class _StdinLines:
+    """
+    Lines read from stdin as raw bytes instead of through input().
+
+    Bytes are fed in either from an event-loop reader callback (attach) or
+    from a blocking os.read() loop on a worker thread (start_reader), and
+    split into lines on an asyncio.Queue; None on the queue marks EOF.
+    """
+
+    def __init__(self):
+        self._queue = asyncio.Queue()
+        self._partial = b""
+        self._loop = None
+        self._fd = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop, fd: int):
+        """Watch fd with loop.add_reader (raises if the loop/fd can't do it)."""
+        loop.add_reader(fd, self._on_readable)
+        self._loop = loop
+        self._fd = fd
+
+    def detach(self):
+        if self._loop is not None:
+            self._loop.remove_reader(self._fd)
+            self._loop = None
+
+    def start_reader(self, loop: asyncio.AbstractEventLoop, fd: int):
+        """Read fd with blocking os.read() on a daemon thread, for stdin
+        that can't be watched by the loop (Windows consoles).
+
+        Not an executor worker: those are joined at interpreter exit, and
+        this thread is parked in os.read() after 'quit'.
+        """
+        threading.Thread(
+            target=self._read_blocking, args=(loop, fd),
+            name="cli-stdin", daemon=True,
+        ).start()
+
+    def _read_blocking(self, loop: asyncio.AbstractEventLoop, fd: int):
+        while True:
+            try:
+                data = os.read(fd, 4096)
+            except OSError:
+                data = b""
+            try:
+                loop.call_soon_threadsafe(self.feed, data)
+            except RuntimeError:
+                return  # loop already closed
+            if not data:
+                return
+
+    def _on_readable(self):
+        data = os.read(self._fd, 4096)
+        if not data:
+            self.detach()
+        self.feed(data)
+
+    def feed(self, data: bytes):
+        """Add raw stdin bytes; empty data means EOF."""
+        if not data:
+            if self._partial:
+                self._queue.put_nowait(self._partial.decode(errors="replace"))
+                self._partial = b""
+            self._queue.put_nowait(None)
+            return
+        *lines, self._partial = (self._partial + data).split(b"\n")
+        for raw in lines:
+            self._queue.put_nowait(raw.decode(errors="replace"))
+
+    async def readline(self, prompt: str) -> str:
+        print(prompt, end="", flush=True)
+        line = await self._queue.get()
+        if line is None:
+            raise EOFError
+        return line
+
 
-    help_text = """
+_HELP_TEXT = """
 === Commands ===
   walk <n/s/e/w/ne/se/sw/nw> [steps]
   turn <n/s/e/w>
@@ -117,63 +225,134 @@ async def cli_loop(bot: BotController):
   quit
 """
 
-    while True:
-        try:
-            line = await loop.run_in_executor(None, lambda: input("bot> "))
-            line = line.strip()
-            if not line:
-                continue
-
-            parts = line.split()
-            cmd = parts[0].lower()
-            args = parts[1:]
-
-            if not bot.ready:
-                print("Bot not ready yet. Login in the game client first.")
-                continue
+# Commands that work before the game login has been seen
+_NO_LOGIN_COMMANDS = frozenset({'help', 'status'})
+
+
+def _cli_handlers(bot: BotController) -> dict:
+    """Build the CLI command table: name -> async handler(rest).
+
+    `rest` is the raw text after the command word; handlers split it only
+    if they take positional arguments. Single-packet commands build and
+    queue their packet directly rather than going through BotController.
+    """
+    inject = bot.proxy.inject_to_server_nowait
+
+    async def cmd_help(rest):
+        print(_HELP_TEXT)
+
+    async def cmd_walk(rest):
+        args = rest.split()
+        if not args:
+            print("Usage: walk <direction> [steps]")
+        else:
+            steps = int(args[1]) if len(args) > 1 else 1
+            await bot.walk(args[0], steps)
+
+    async def cmd_turn(rest):
+        args = rest.split()
+        if args:
+            await bot.turn(args[0])
+
+    async def cmd_stop(rest):
+        inject(_STOP_PKT)
+
+    async def cmd_autowalk(rest):
+        args = rest.split()
+        if args:
+            steps = int(args[1]) if len(args) > 1 else 100
+            delay = float(args[2]) if len(args) > 2 else 0.5
+            await bot.autowalk(args[0], steps, delay)
+
+    async def cmd_stopauto(rest):
+        await bot.stopauto()
+
+    async def cmd_say(rest):
+        if rest:
+            inject(build_say_packet(rest))
+
+    async def cmd_attack(rest):
+        args = rest.split()
+        if args:
+            inject(build_attack_packet(int(args[0])))
+
+    async def cmd_follow(rest):
+        args = rest.split()
+        if args:
+            inject(build_follow_packet(int(args[0])))
+
+    async def cmd_status(rest):
+        print(f"Ready: {bot.ready}")
+        print(f"Packets S->C: {bot.proxy.packets_from_server}")
+        print(f"Packets C->S: {bot.proxy.packets_from_client}")
+
+    return {
+        'help': cmd_help,
+        'walk': cmd_walk,
+        'turn': cmd_turn,
+        'stop': cmd_stop,
+        'autowalk': cmd_autowalk,
+        'stopauto': cmd_stopauto,
+        'say': cmd_say,
+        'attack': cmd_attack,
+        'follow': cmd_follow,
+        'status': cmd_status,
+    }
+
+
+async def cli_loop(bot: BotController, executor: ThreadPoolExecutor | None = None):
+    """Interactive command line.
+
+    On POSIX, stdin is watched with loop.add_reader so commands are read on
+    the event loop itself. On Windows (which can't select() on stdin), a
+    daemon thread runs a blocking os.read() loop. If stdin has no usable
+    fd, input() runs on `executor` (a dedicated single thread from main()).
+    """
+    loop = asyncio.get_running_loop()
+
+    stdin_lines = _StdinLines()
+    try:
+        fd = sys.stdin.fileno()
+        if sys.platform != 'win32':
+            stdin_lines.attach(loop, fd)
+        else:
+            stdin_lines.start_reader(loop, fd)
+    except (OSError, ValueError, NotImplementedError):
+        stdin_lines = None
+
+    handlers = _cli_handlers(bot)
+    try:
+        while True:
+            try:
+                if stdin_lines is not None:
+                    line = await stdin_lines.readline("bot> ")
+                else:
+                    line = await loop.run_in_executor(executor, input, "bot> ")
+                line = line.strip()
+                if not line:
+                    continue
+
+                parts = line.split(None, 1)
+                cmd = parts[0].lower()
+                if cmd == 'quit' or cmd == 'exit':
+                    break
+                if not bot.ready and cmd not in _NO_LOGIN_COMMANDS:
+                    print("Bot not ready yet. Login in the game client first.")
+                    continue
+
+                handler = handlers.get(cmd)
+                if handler is None:
+                    print(f"Unknown: {cmd}. Type 'help'.")
+                else:
+                    await handler(parts[1] if len(parts) > 1 else "")
 
-            if cmd == 'help':
-                print(help_text)
-            elif cmd == 'quit' or cmd == 'exit':
+            except (EOFError, KeyboardInterrupt):
                 break
-            elif cmd == 'walk':
-                if not args:
-                    print("Usage: walk <direction> [steps]")
-                else:
-                    steps = int(args[1]) if len(args) > 1 else 1
-                    await bot.walk(args[0], steps)
-            elif cmd == 'turn':
-                if args:
-                    await bot.turn(args[0])
-            elif cmd == 'stop':
-                await bot.stop()
-            elif cmd == 'autowalk':
-                if args:
-                    steps = int(args[1]) if len(args) > 1 else 100
-                    delay = float(args[2]) if len(args) > 2 else 0.5
-                    await bot.autowalk(args[0], steps, delay)
-            elif cmd == 'stopauto':
-                await bot.stopauto()
-            elif cmd == 'say':
-                if args:
-                    await bot.say(' '.join(args))
-            elif cmd == 'attack':
-                if args:
-                    await bot.attack(int(args[0]))
-            elif cmd == 'follow':
-                if args:
-                    await bot.follow(int(args[0]))
-            elif cmd == 'status':
-                print(f"Ready: {bot.ready}")
-                print(f"Packets S->C: {bot.proxy.packets_from_server}")
-                print(f"Packets C->S: {bot.proxy.packets_from_client}")
-            else:
-                print(f"Unknown: {cmd}. Type 'help'.")
-
-        except (EOFError, KeyboardInterrupt):
-            break
-        except Exception as e:
-            print(f"Error: {e}")
+            except Exception as e:
+                print(f"Error: {e}")
+    finally:
+        if stdin_lines is not None:
+            stdin_lines.detach()
 
 
 def patch_client() -> bool:
@@ -192,13 +371,13 @@ def patch_client() -> bool:
 
     print(f"[OK] Attached to client (PID: {pm.process_id})")
 
-    from patcher import find_server_address_in_memory, patch_memory
+    from patcher import find_server_address_in_memory, patch_memory_bulk
 
     # Only patch server IP to redirect to our proxy
     # No RSA patching needed - we know the default OTClient RSA private key!
     ip_locs = find_server_address_in_memory(pm)
     localhost = b"127.0.0.1"
-    patched_ip = sum(1 for addr, old in ip_locs if patch_memory(pm, addr, old, localhost))
+    patched_ip = patch_memory_bulk(pm, ip_locs, localhost)
 
     pm.close_process()
 
@@ -232,18 +411,12 @@ async def main():
 
     # Set up callbacks
     def on_server_packet(opcode, reader):
-        try:
-            name = ServerOpcode(opcode).name
-        except ValueError:
-            name = "?"
-        log.debug(f"[S->C] 0x{opcode:02X} ({name})")
+        if packet_log.isEnabledFor(logging.DEBUG):
+            packet_log.debug("[S->C] 0x%02X (%s)", opcode, SERVER_OPCODE_NAMES.get(opcode, "?"))
 
     def on_client_packet(opcode, reader):
-        try:
-            name = ClientOpcode(opcode).name
-        except ValueError:
-            name = "?"
-        log.debug(f"[C->S] 0x{opcode:02X} ({name})")
+        if packet_log.isEnabledFor(logging.DEBUG):
+            packet_log.debug("[C->S] 0x%02X (%s)", opcode, CLIENT_OPCODE_NAMES.get(opcode, "?"))
 
     def on_login_success(keys):
         bot.ready = True
@@ -253,10 +426,20 @@ async def main():
     game_proxy.on_client_packet = on_client_packet
     game_proxy.on_login_success = on_login_success
 
-    # Patch client memory (only server IP, no RSA needed)
+    # Start the proxies first so they are listening while memory is scanned
+    proxy_tasks = [
+        asyncio.create_task(login_proxy.start()),
+        asyncio.create_task(game_proxy.start()),
+    ]
+
+    # Patch client memory (only server IP, no RSA needed). pymem calls are
+    # blocking ReadProcessMemory/WriteProcessMemory, so run them off-loop.
     print(f"\n[..] Patching game client...")
-    success = patch_client()
+    success = await asyncio.to_thread(patch_client)
     if not success:
+        for t in proxy_tasks:
+            t.cancel()
+        await asyncio.gather(*proxy_tasks, return_exceptions=True)
         print("[FAIL] Could not patch client. Try running as Administrator.")
         input("\nPress Enter to exit...")
         return
@@ -269,16 +452,24 @@ async def main():
     print()
 
     # Start everything
-    tasks = [
-        asyncio.create_task(login_proxy.start()),
-        asyncio.create_task(game_proxy.start()),
-        asyncio.create_task(cli_loop(bot)),
+    cli_exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cli")
+    tasks = proxy_tasks + [
+        asyncio.create_task(cli_loop(bot, cli_exec)),
     ]
 
-    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
-    for t in pending:
-        t.cancel()
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for t in done:
+            if not t.cancelled() and t.exception() is not None:
+                log.error(f"Task failed: {t.exception()!r}")
+        for t in pending:
+            t.cancel()
+        # Wait for the cancellations to land so the proxies' servers close
+        await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        cli_exec.shutdown(wait=False)
 
 
 if __name__ == "__main__":
+    install_fast_event_loop()
     asyncio.run(main())
@@ -0,0 +1,221 @@
+"""Waypoint/recording builders and assertion helpers shared by the tests."""
+
+import copy
+import functools
+from operator import itemgetter
+
+# Direction → (dx, dy) for computing post-walk pos from player_pos
+_DIR_OFFSET = {
+    "north": (0, -1), "south": (0, 1),
+    "east": (1, 0), "west": (-1, 0),
+    "northeast": (1, -1), "southeast": (1, 1),
+    "southwest": (-1, 1), "northwest": (-1, -1),
+}
+_DIR_GET = _DIR_OFFSET.get
+_NO_OFFSET = (0, 0)
+
+
+# ── Helpers ──────────────────────────────────────────────────────────
+
+# Waypoint prototypes — helpers copy these and fill in the per-call fields.
+_WALK_PROTO = {
+    "type": "walk", "direction": None,
+    "pos": None, "player_pos": None, "t": 0.0,
+}
+_AUTOWALK_PROTO = {"type": "walk", "direction": "autowalk", "pos": None, "t": 0.0}
+_USE_ITEM_PROTO = {
+    "type": "use_item",
+    "x": 0, "y": 0, "z": 0,
+    "item_id": 0,
+    "stack_pos": 0,
+    "index": 0,
+    "label": None,
+    "pos": None,
+    "t": 0.0,
+}
+_USE_ITEM_EX_PROTO = {
+    "type": "use_item_ex",
+    "from_x": 0, "from_y": 0, "from_z": 0,
+    "item_id": 0,
+    "stack_pos": 0,
+    "to_x": 0, "to_y": 0, "to_z": 0,
+    "to_stack_pos": 0,
+    "label": None,
+    "pos": None,
+    "t": 0.0,
+}
+
+
+def _as_pos(p):
+    """Position as a list, like a JSON-loaded recording. Lists are used
+    as-is; tuples are copied (build_actions_map passes pos through as the
+    node target, and tests compare targets against lists)."""
+    return p if type(p) is list else [p[0], p[1], p[2]]
+
+
+def _walk(direction, player_pos, t=0.0):
+    """Create a keyboard walk waypoint.
+
+    player_pos is where the player was BEFORE the walk.
+    pos (destination) is computed as player_pos + direction offset.
+    This matches the real recording format.
+    """
+    dx, dy = _DIR_GET(direction, _NO_OFFSET)
+    px, py, pz = player_pos
+    wp = _WALK_PROTO.copy()
+    wp["direction"] = direction
+    wp["pos"] = [px + dx, py + dy, pz]
+    wp["player_pos"] = [px, py, pz]
+    wp["t"] = t
+    return wp
+
+
+def _autowalk(pos, player_pos=None, t=0.0):
+    """Create an autowalk waypoint (pos = final destination)."""
+    wp = _AUTOWALK_PROTO.copy()
+    wp["pos"] = _as_pos(pos)
+    wp["t"] = t
+    if player_pos is not None:
+        wp["player_pos"] = _as_pos(player_pos)
+    return wp
+
+
+def _position(pos, t=0.0):
+    """Create a position waypoint (recorded by position tracking thread).
+    Kept for backwards-compat tests — new recordings no longer emit these.
+    """
+    return {"type": "position", "pos": _as_pos(pos), "t": t}
+
+
+def _floor_change(direction, pos, z=None, t=0.0):
+    """Create a floor_change waypoint (from server event)."""
+    return {"type": "floor_change", "direction": direction,
+            "pos": _as_pos(pos), "z": z if z is not None else pos[2], "t": t}
+
+
+def _use_item(x, y, z, item_id, player_pos, stack_pos=0, index=0, label=None):
+    """Create a use_item waypoint."""
+    wp = _USE_ITEM_PROTO.copy()
+    wp["x"] = x
+    wp["y"] = y
+    wp["z"] = z
+    wp["item_id"] = item_id
+    wp["stack_pos"] = stack_pos
+    wp["index"] = index
+    wp["label"] = label or f"Use item {item_id}"
+    wp["pos"] = _as_pos(player_pos)
+    return wp
+
+
+def _use_item_ex(from_pos, item_id, to_pos, player_pos, stack_pos=0, to_stack_pos=0):
+    """Create a use_item_ex waypoint."""
+    wp = _USE_ITEM_EX_PROTO.copy()
+    wp["from_x"], wp["from_y"], wp["from_z"] = from_pos
+    wp["item_id"] = item_id
+    wp["stack_pos"] = stack_pos
+    wp["to_x"], wp["to_y"], wp["to_z"] = to_pos
+    wp["to_stack_pos"] = to_stack_pos
+    wp["label"] = f"Use item {item_id}"
+    wp["pos"] = _as_pos(player_pos)
+    return wp
+
+
+def _walk_line(direction, start, steps):
+    """Create `steps` consecutive keyboard walks in one direction from start.
+
+    Each walk's destination is the next walk's player_pos, as in a real
+    recording of the player holding an arrow key.
+    """
+    dx, dy = _DIR_OFFSET[direction]
+    x, y, z = start
+    wps = []
+    for _ in range(steps):
+        wp = _WALK_PROTO.copy()
+        wp["direction"] = direction
+        wp["player_pos"] = [x, y, z]
+        x += dx
+        y += dy
+        wp["pos"] = [x, y, z]
+        wps.append(wp)
+    return wps
+
+
+def _rec(waypoints):
+    """Wrap waypoints in a recording dict."""
+    return {"waypoints": waypoints}
+
+
+_type_and_target = itemgetter("type", "target")
+_get_target = itemgetter("target")
+
+
+def _targets(nodes):
+    """Extract (type, target) tuples from actions map for easy assertion."""
+    return [(t, tuple(target)) for t, target in map(_type_and_target, nodes)]
+
+
+@functools.lru_cache(maxsize=1024)
+def _md(px, py, x, y):
+    """Manhattan distance on the x/y plane (floor ignored, as for map clicks)."""
+    return abs(px - x) + abs(py - y)
+
+
+def _by_type(nodes):
+    """Group nodes by their "type" in one pass: {type: [node, ...]}."""
+    out = {}
+    for n in nodes:
+        out.setdefault(n["type"], []).append(n)
+    return out
+
+
+def _has_floors(nodes, *floors):
+    """True if nodes target every given floor; stops at the first node
+    that completes the set."""
+    missing = set(floors)
+    for n in nodes:
+        missing.discard(n["target"][2])
+        if not missing:
+            return True
+    return False
+
+
+def _freeze(obj):
+    """Recording (dicts/lists/tuples/scalars) -> hashable nested tuples.
+
+    Everything becomes a (kind, value) pair: containers are tagged "d",
+    "l" or "t", scalars with their type name. So _thaw can rebuild each
+    value exactly, and recordings differing only in 1 / 1.0 / True don't
+    share a cache entry.
+    """
+    if isinstance(obj, dict):
+        return ("d", tuple((_freeze(k), _freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, list):
+        return ("l", tuple(_freeze(v) for v in obj))
+    if isinstance(obj, tuple):
+        return ("t", tuple(_freeze(v) for v in obj))
+    return (type(obj).__name__, obj)
+
+
+def _thaw(frozen):
+    kind, items = frozen
+    if kind == "d":
+        return {_thaw(k): _thaw(v) for k, v in items}
+    if kind == "l":
+        return [_thaw(v) for v in items]
+    if kind == "t":
+        return tuple(_thaw(v) for v in items)
+    return items
+
+
+@functools.lru_cache(maxsize=512)
+def _cached_build(build_actions_map, frozen):
+    return build_actions_map(_thaw(frozen))
+
+
+def _build(build_actions_map, rec):
+    """build_actions_map(rec), memoised on the recording's contents.
+
+    For tests whose recordings repeat across the suite. Returns a private
+    copy, so a test can't alter what another test sees.
+    """
+    return copy.deepcopy(_cached_build(build_actions_map, _freeze(rec)))
@@ -0,0 +1,94 @@
+"""Shared test setup: project import path and session-wide fixtures."""
+
+import ctypes
+import importlib.util
+import os
+import sys
+import types
+
+import pytest
+
+# Make the project's flat modules (cavebot, protocol, ...) importable
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+# cavebot callables under test, imported once per session and passed
+# into tests as local names.
+
+@pytest.fixture(scope="session")
+def build_actions_map():
+    from cavebot import build_actions_map
+    return build_actions_map
+
+
+@pytest.fixture(scope="session")
+def simplify_path():
+    from cavebot import _simplify_path
+    return _simplify_path
+
+
+@pytest.fixture(scope="session")
+def is_map_click_walk():
+    from cavebot import _is_map_click_walk
+    return _is_map_click_walk
+
+
+# crypto needs pycryptodome for its RSA helpers
+
+@pytest.fixture(scope="session")
+def crypto():
+    pytest.importorskip("Crypto")
+    import crypto
+    return crypto
+
+
+@pytest.fixture(scope="session")
+def ot_proxy_cls():
+    pytest.importorskip("Crypto")
+    from proxy import OTProxy
+    return OTProxy
+
+
+# patcher needs pymem (Windows); its tests are skipped where it is missing
+
+@pytest.fixture(scope="session")
+def read_span_bytes():
+    pytest.importorskip("pymem")
+    from patcher import _read_span_bytes
+    return _read_span_bytes
+
+
+@pytest.fixture(scope="session")
+def patch_memory_bulk():
+    pytest.importorskip("pymem")
+    from patcher import patch_memory_bulk
+    return patch_memory_bulk
+
+
+class _Kernel32Stub:
+    """Stand-in for ctypes.WinDLL("kernel32") off Windows: every function is
+    a namespace that accepts argtypes/restype and is never called."""
+
+    def __getattr__(self, name):
+        fn = types.SimpleNamespace()
+        setattr(self, name, fn)
+        return fn
+
+
+@pytest.fixture(scope="session")
+def xtea_finder():
+    """xtea_finder, imported with stubs for pymem and kernel32 where those
+    are missing. The scan functions under test use neither."""
+    with pytest.MonkeyPatch.context() as mp:
+        if importlib.util.find_spec("pymem") is None:
+            pymem = types.ModuleType("pymem")
+            pymem.Pymem = object
+            pymem.process = types.ModuleType("pymem.process")
+            mp.setitem(sys.modules, "pymem", pymem)
+            mp.setitem(sys.modules, "pymem.process", pymem.process)
+        if not hasattr(ctypes, "WinDLL"):
+            mp.setattr(ctypes, "WinDLL", lambda *a, **k: _Kernel32Stub(), raising=False)
+        import xtea_finder
+    return xtea_finder
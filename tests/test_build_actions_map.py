@@ -1,123 +1,143 @@
-"""Unit tests for cavebot.build_actions_map — recording → actions map conversion."""
+"""Unit tests for cavebot.build_actions_map — recording → actions map conversion.
 
-import sys
-import os
-import pytest
-
-# Add project root to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from cavebot import build_actions_map, _simplify_path, _is_map_click_walk
-
-# Direction → (dx, dy) for computing post-walk pos from player_pos
-_DIR_OFFSET = {
-    "north": (0, -1), "south": (0, 1),
-    "east": (1, 0), "west": (-1, 0),
-    "northeast": (1, -1), "southeast": (1, 1),
-    "southwest": (-1, 1), "northwest": (-1, -1),
-}
-
-
-# ── Helpers ──────────────────────────────────────────────────────────
-
-def _walk(direction, player_pos, t=0.0):
-    """Create a keyboard walk waypoint.
-
-    player_pos is where the player was BEFORE the walk.
-    pos (destination) is computed as player_pos + direction offset.
-    This matches the real recording format.
-    """
-    dx, dy = _DIR_OFFSET.get(direction, (0, 0))
-    pos = [player_pos[0] + dx, player_pos[1] + dy, player_pos[2]]
-    return {
-        "type": "walk", "direction": direction,
-        "pos": pos, "player_pos": list(player_pos), "t": t,
-    }
-
-
-def _autowalk(pos, player_pos=None, t=0.0):
-    """Create an autowalk waypoint (pos = final destination)."""
-    wp = {"type": "walk", "direction": "autowalk", "pos": list(pos), "t": t}
-    if player_pos is not None:
-        wp["player_pos"] = list(player_pos)
-    return wp
+The functions under test come from the session fixtures in conftest.py;
+waypoint builders and assertion helpers live in _helpers.py.
+"""
 
+import functools
+import pytest
 
-def _position(pos, t=0.0):
-    """Create a position waypoint (recorded by position tracking thread).
-    Kept for backwards-compat tests — new recordings no longer emit these.
+from _helpers import (
+    _DIR_OFFSET, _autowalk, _build, _by_type, _floor_change, _get_target,
+    _has_floors, _md, _position, _rec, _targets, _use_item, _use_item_ex,
+    _walk, _walk_line,
+)
+
+# Expected (direction, dx, dy) for each walk direction, spelled out
+# independently of _DIR_OFFSET so the direction test isn't circular
+_DIRS = (
+    ("north", 0, -1), ("south", 0, 1),
+    ("east", 1, 0), ("west", -1, 0),
+    ("northeast", 1, -1), ("southeast", 1, 1),
+    ("southwest", -1, 1), ("northwest", -1, -1),
+)
+
+
+# ── Shared recordings ────────────────────────────────────────────────
+
+# Read-only trivial recordings
+_EMPTY_REC = {"waypoints": []}
+_NO_KEY_REC = {}
+
+
+# The fixtures below build each recording and run it through
+# build_actions_map once per module; the tests using them only assert on
+# the resulting nodes, which nothing mutates.
+
+@pytest.fixture(scope="module")
+def long_north_walk_nodes(build_actions_map):
+    """Nodes for 20 consecutive keyboard walks north."""
+    return build_actions_map(_rec(_walk_line("north", (100, 200, 7), 20)))
+
+
+@pytest.fixture(scope="module")
+def scattered_autowalk_nodes(build_actions_map):
+    """Nodes for 10 autowalks on floor 7 then floor 6, at uneven spacing."""
+    return build_actions_map(_rec([
+        _autowalk((125, 564, 7)),
+        _autowalk((126, 564, 7)),
+        _autowalk((127, 564, 7)),
+        _autowalk((128, 564, 7)),
+        _autowalk((127, 568, 6)),
+        _autowalk((127, 570, 6)),
+        _autowalk((128, 576, 6)),
+        _autowalk((128, 579, 6)),
+        _autowalk((133, 581, 6)),
+        _autowalk((135, 581, 6)),
+    ]))
+
+
+@pytest.fixture(scope="module")
+def long_recording_nodes(build_actions_map):
+    """Nodes for 50 walks east, a use_item, then 50 walks back west (101 waypoints)."""
+    return build_actions_map(_rec([
+        *_walk_line("east", (100, 200, 7), 50),
+        _use_item(150, 200, 7, 1696, player_pos=(150, 200, 7)),
+        *_walk_line("west", (150, 200, 7), 50),
+    ]))
+
+
+@pytest.fixture(scope="module")
+def door_sequence_nodes(build_actions_map):
+    """Nodes for walk → door → walk through → walk back → door again."""
+    return build_actions_map(_rec([
+        # Walk to door
+        _walk("east", (135, 564, 6)),  # dest: (136, 564, 6)
+        _walk("east", (136, 564, 6)),  # dest: (137, 564, 6) — exact (before door)
+        # Open door
+        _use_item(137, 564, 6, 1696, player_pos=(137, 564, 6)),
+        # Walk through
+        _walk("west", (137, 564, 6)),  # dest: (136, 564, 6)
+        _walk("west", (136, 564, 6)),  # dest: (135, 564, 6)
+    ]))
+
+
+@pytest.fixture(scope="module")
+def mixed_sequence_nodes(build_actions_map):
+    """Nodes for autowalk, use_item, autowalk, use_item_ex."""
+    return build_actions_map(_rec([
+        _autowalk((100, 200, 7)),
+        _use_item(100, 200, 7, 1696, player_pos=(100, 200, 7)),
+        _autowalk((110, 200, 7)),
+        _use_item_ex((0xFFFF, 0, 0), 2120, (110, 200, 8), (110, 200, 7)),
+    ]))
+
+
+@pytest.fixture(scope="module")
+def one_walk_per_direction(build_actions_map):
+    """{direction: (walk_to node, start pos)} for one keyboard walk per direction.
+
+    All eight walks go through a single build_actions_map call. Each starts
+    10 tiles east of the previous one and is followed by a use_item on its
+    destination tile, which keeps the walks from being grouped together.
     """
-    return {"type": "position", "pos": list(pos), "t": t}
-
-
-def _floor_change(direction, pos, z=None, t=0.0):
-    """Create a floor_change waypoint (from server event)."""
-    return {"type": "floor_change", "direction": direction,
-            "pos": list(pos), "z": z if z is not None else pos[2], "t": t}
-
-
-def _use_item(x, y, z, item_id, player_pos, stack_pos=0, index=0, label=None):
-    """Create a use_item waypoint."""
-    return {
-        "type": "use_item",
-        "x": x, "y": y, "z": z,
-        "item_id": item_id,
-        "stack_pos": stack_pos,
-        "index": index,
-        "label": label or f"Use item {item_id}",
-        "pos": list(player_pos),
-        "t": 0.0,
-    }
-
-
-def _use_item_ex(from_pos, item_id, to_pos, player_pos, stack_pos=0, to_stack_pos=0):
-    """Create a use_item_ex waypoint."""
-    return {
-        "type": "use_item_ex",
-        "from_x": from_pos[0], "from_y": from_pos[1], "from_z": from_pos[2],
-        "item_id": item_id,
-        "stack_pos": stack_pos,
-        "to_x": to_pos[0], "to_y": to_pos[1], "to_z": to_pos[2],
-        "to_stack_pos": to_stack_pos,
-        "label": f"Use item {item_id}",
-        "pos": list(player_pos),
-        "t": 0.0,
-    }
-
-
-def _rec(waypoints):
-    """Wrap waypoints in a recording dict."""
-    return {"waypoints": waypoints}
-
-
-def _targets(nodes):
-    """Extract (type, target) tuples from actions map for easy assertion."""
-    return [(n["type"], tuple(n["target"])) for n in nodes]
+    wps = []
+    starts = {}
+    for i, (direction, (dx, dy)) in enumerate(_DIR_OFFSET.items()):
+        start = (100 + 10 * i, 200, 7)
+        starts[direction] = start
+        wps.append(_walk(direction, start))
+        wps.append(_use_item(start[0] + dx, start[1] + dy, 7, 1696,
+                             player_pos=(start[0] + dx, start[1] + dy, 7)))
+    nodes = build_actions_map(_rec(wps))
+    walk_nodes = [n for n in nodes if n["type"] == "walk_to"]
+    assert len(walk_nodes) == len(starts)
+    return {d: (node, starts[d]) for d, node in zip(starts, walk_nodes)}
 
 
 # ── Empty / trivial cases ────────────────────────────────────────────
 
 class TestEmptyAndTrivial:
-    def test_empty_recording(self):
-        assert build_actions_map({"waypoints": []}) == []
+    def test_empty_recording(self, build_actions_map):
+        assert build_actions_map(_EMPTY_REC) == []
 
-    def test_no_waypoints_key(self):
-        assert build_actions_map({}) == []
+    def test_no_waypoints_key(self, build_actions_map):
+        assert build_actions_map(_NO_KEY_REC) == []
 
-    def test_single_autowalk(self):
-        nodes = build_actions_map(_rec([_autowalk((100, 200, 7))]))
+    def test_single_autowalk(self, build_actions_map):
+        nodes = _build(build_actions_map, _rec([_autowalk((100, 200, 7))]))
         assert len(nodes) == 1
         assert nodes[0]["type"] == "walk_to"
         assert nodes[0]["target"] == [100, 200, 7]
 
-    def test_single_keyboard_walk(self):
+    def test_single_keyboard_walk(self, build_actions_map):
         # Keyboard walk north: player_pos=(100,200,7), destination pos=(100,199,7)
-        nodes = build_actions_map(_rec([_walk("north", (100, 200, 7))]))
+        nodes = _build(build_actions_map, _rec([_walk("north", (100, 200, 7))]))
         assert len(nodes) == 1
         assert nodes[0]["type"] == "walk_to"
         assert nodes[0]["target"] == [100, 199, 7]
 
-    def test_single_use_item_close(self):
+    def test_single_use_item_close(self, build_actions_map):
         # use_item with distance <= 1 from player → stays as use_item
         nodes = build_actions_map(_rec([
             _use_item(100, 200, 7, 1696, player_pos=(100, 201, 7)),
@@ -126,7 +146,7 @@ class TestEmptyAndTrivial:
         assert nodes[0]["type"] == "use_item"
         assert nodes[0]["item_id"] == 1696
 
-    def test_single_use_item_ex(self):
+    def test_single_use_item_ex(self, build_actions_map):
         nodes = build_actions_map(_rec([
             _use_item_ex((0xFFFF, 0, 0), 2120, (100, 200, 7), (100, 201, 7)),
         ]))
@@ -138,91 +158,85 @@ class TestEmptyAndTrivial:
 # ── _is_map_click_walk ───────────────────────────────────────────────
 
 class TestIsMapClickWalk:
-    def test_far_tile_is_map_click(self):
-        wp = _use_item(110, 200, 7, 486, player_pos=(100, 200, 7))
-        assert _is_map_click_walk(wp) is True
-
-    def test_adjacent_tile_is_not_map_click(self):
-        wp = _use_item(101, 200, 7, 1696, player_pos=(100, 200, 7))
-        assert _is_map_click_walk(wp) is False
-
-    def test_same_tile_is_not_map_click(self):
-        wp = _use_item(100, 200, 7, 1968, player_pos=(100, 200, 7))
-        assert _is_map_click_walk(wp) is False
-
-    def test_different_floor_adjacent_is_not_map_click(self):
+    # Waypoints are built once at import; the player stands at (100, 200, 7).
+    @pytest.mark.parametrize("wp,expected", [
+        (_use_item(110, 200, 7, 486, player_pos=(100, 200, 7)), True),
+        (_use_item(101, 200, 7, 1696, player_pos=(100, 200, 7)), False),
+        (_use_item(100, 200, 7, 1968, player_pos=(100, 200, 7)), False),
         # Standing at z=7, clicking item at z=6 one tile away — distance is 1
-        wp = _use_item(101, 200, 6, 1968, player_pos=(100, 200, 7))
-        assert _is_map_click_walk(wp) is False
-
-    def test_non_use_item_returns_false(self):
-        wp = _walk("north", (100, 200, 7))
-        assert _is_map_click_walk(wp) is False
+        (_use_item(101, 200, 6, 1968, player_pos=(100, 200, 7)), False),
+        (_use_item(100, 201, 7, 1696, player_pos=(100, 200, 7)), False),
+        (_use_item(100, 202, 7, 486, player_pos=(100, 200, 7)), True),
+        (_walk("north", (100, 200, 7)), False),
+    ], ids=["far", "adjacent", "same_tile", "other_floor_adjacent",
+            "distance_1", "distance_2", "not_use_item"])
+    def test_is_map_click_walk(self, is_map_click_walk, wp, expected):
+        if wp["type"] == "use_item":
+            # The table itself must follow the rule: map click iff distance > 1
+            px, py, _ = wp["pos"]
+            assert (_md(px, py, wp["x"], wp["y"]) > 1) is expected
+        assert is_map_click_walk(wp) is expected
 
-    def test_distance_exactly_one_is_not_map_click(self):
-        # Manhattan distance exactly 1
-        wp = _use_item(100, 201, 7, 1696, player_pos=(100, 200, 7))
-        assert _is_map_click_walk(wp) is False
 
-    def test_distance_two_is_map_click(self):
-        # Manhattan distance exactly 2
-        wp = _use_item(100, 202, 7, 486, player_pos=(100, 200, 7))
-        assert _is_map_click_walk(wp) is True
+# ── _simplify_path ───────────────────────────────────────────────────
 
+# 20 consecutive tiles in a straight line, shared by the max_gap cases
+_LINE_20 = tuple((100 + i, 200, 7, 486, 1) for i in range(20))
+
+
+@functools.lru_cache(maxsize=None)
+def _line_simplified_len(simplify_path, max_gap):
+    """len(simplify_path(_LINE_20)) per gap — each gap is simplified once."""
+    return len(simplify_path(list(_LINE_20), max_gap=max_gap))
+
+
+def _keeps_ends(pts, result):
+    return result[0] == pts[0] and result[-1] == pts[-1]
+
+
+# (points, kwargs, check(pts, result) -> bool), one _simplify_path call each
+_SIMPLIFY_CASES = [
+    pytest.param([], {}, lambda pts, r: r == [], id="empty"),
+    pytest.param([(100, 200, 7, 486, 1)], {}, lambda pts, r: r == pts, id="single"),
+    # Two points within max_gap — still keeps both (last is always kept)
+    pytest.param(
+        [(100, 200, 7, 486, 1), (101, 200, 7, 486, 1)], {},
+        lambda pts, r: len(r) == 2, id="two_close",
+    ),
+    # A line of 10 consecutive tiles should be reduced; first and last
+    # always kept, intermediates at max_gap=3 intervals
+    pytest.param(
+        [(100 + i, 200, 7, 486, 1) for i in range(10)], {},
+        lambda pts, r: _keeps_ends(pts, r) and len(r) < len(pts), id="many_close",
+    ),
+    pytest.param(
+        [(100, 200, 7, 486, 1), (100, 201, 7, 486, 1), (100, 210, 7, 486, 1)], {},
+        _keeps_ends, id="preserve_ends",
+    ),
+    # Points already > max_gap apart should all be kept
+    pytest.param(
+        [(100, 200, 7, 486, 1), (105, 200, 7, 486, 1), (110, 200, 7, 486, 1)],
+        {"max_gap": 3}, lambda pts, r: len(r) == 3, id="far_apart",
+    ),
+]
 
-# ── _simplify_path ───────────────────────────────────────────────────
 
 class TestSimplifyPath:
-    def test_empty(self):
-        assert _simplify_path([]) == []
-
-    def test_single_point(self):
-        pts = [(100, 200, 7, 486, 1)]
-        assert _simplify_path(pts) == pts
-
-    def test_two_points_close(self):
-        """Two points within max_gap — still keeps both (last is always kept)."""
-        pts = [(100, 200, 7, 486, 1), (101, 200, 7, 486, 1)]
-        result = _simplify_path(pts)
-        assert len(result) == 2
-
-    def test_many_close_points_simplified(self):
-        """A line of 10 consecutive tiles should be reduced."""
-        pts = [(100 + i, 200, 7, 486, 1) for i in range(10)]
-        result = _simplify_path(pts)
-        # First and last always kept; intermediates at max_gap=3 intervals
-        assert result[0] == pts[0]
-        assert result[-1] == pts[-1]
-        assert len(result) < len(pts)
-
-    def test_preserves_first_and_last(self):
-        pts = [(100, 200, 7, 486, 1), (100, 201, 7, 486, 1), (100, 210, 7, 486, 1)]
-        result = _simplify_path(pts)
-        assert result[0] == pts[0]
-        assert result[-1] == pts[-1]
-
-    def test_far_apart_points_all_kept(self):
-        """Points already > max_gap apart should all be kept."""
-        pts = [
-            (100, 200, 7, 486, 1),
-            (105, 200, 7, 486, 1),
-            (110, 200, 7, 486, 1),
-        ]
-        result = _simplify_path(pts, max_gap=3)
-        assert len(result) == 3
+    @pytest.mark.parametrize("pts,kwargs,check", _SIMPLIFY_CASES)
+    def test_cases(self, simplify_path, pts, kwargs, check):
+        result = simplify_path(pts, **kwargs)
+        assert check(pts, result), result
 
-    def test_custom_max_gap(self):
-        pts = [(100 + i, 200, 7, 486, 1) for i in range(20)]
-        result_3 = _simplify_path(pts, max_gap=3)
-        result_5 = _simplify_path(pts, max_gap=5)
+    @pytest.mark.parametrize("small_gap,large_gap", [(1, 2), (3, 5), (5, 10)])
+    def test_custom_max_gap(self, simplify_path, small_gap, large_gap):
         # Larger gap = fewer waypoints
-        assert len(result_5) <= len(result_3)
+        assert _line_simplified_len(simplify_path, large_gap) <= _line_simplified_len(simplify_path, small_gap)
 
 
 # ── Keyboard walks grouping ─────────────────────────────────────────
 
 class TestKeyboardWalks:
-    def test_consecutive_same_direction(self):
+    def test_consecutive_same_direction(self, build_actions_map):
         """Multiple north walks should be grouped and simplified."""
         wps = [
             _walk("north", (100, 205, 7)),
@@ -233,14 +247,15 @@ class TestKeyboardWalks:
         ]
         nodes = build_actions_map(_rec(wps))
         # All should be walk_to nodes
-        for n in nodes:
-            assert n["type"] == "walk_to"
+        assert all(n["type"] == "walk_to" for n in nodes), (
+            f"Expected only walk_to nodes, got: {_targets(nodes)}"
+        )
         # First target should be the first walk's destination
         assert nodes[0]["target"] == [100, 204, 7]
         # Last target should be the last walk's destination
         assert nodes[-1]["target"] == [100, 200, 7]
 
-    def test_direction_change(self):
+    def test_direction_change(self, build_actions_map):
         """Walks in different directions still get grouped as one walk sequence."""
         wps = [
             _walk("north", (100, 200, 7)),
@@ -249,23 +264,17 @@ class TestKeyboardWalks:
             _walk("east", (101, 198, 7)),
         ]
         nodes = build_actions_map(_rec(wps))
-        for n in nodes:
-            assert n["type"] == "walk_to"
-
-    def test_walk_computes_destination_correctly(self):
-        """Verify all 8 directions produce correct destination pos."""
-        directions_and_offsets = {
-            "north": (0, -1), "south": (0, 1),
-            "east": (1, 0), "west": (-1, 0),
-            "northeast": (1, -1), "southeast": (1, 1),
-            "southwest": (-1, 1), "northwest": (-1, -1),
-        }
-        for direction, (dx, dy) in directions_and_offsets.items():
-            nodes = build_actions_map(_rec([_walk(direction, (100, 200, 7))]))
-            assert nodes[0]["target"] == [100 + dx, 200 + dy, 7], \
-                f"Failed for direction {direction}"
-
-    def test_duplicate_positions_deduped_in_path(self):
+        assert all(n["type"] == "walk_to" for n in nodes), (
+            f"Expected only walk_to nodes, got: {_targets(nodes)}"
+        )
+
+    @pytest.mark.parametrize("direction,dx,dy", _DIRS)
+    def test_walk_computes_destination_correctly(self, one_walk_per_direction, direction, dx, dy):
+        """Each of the 8 directions produces the correct destination pos."""
+        node, (x, y, z) = one_walk_per_direction[direction]
+        assert node["target"] == [x + dx, y + dy, z]
+
+    def test_duplicate_positions_deduped_in_path(self, build_actions_map):
         """Two walks resulting in the same destination tile shouldn't create two path points."""
         # Both walks have pos=(100, 199, 7) — duplicate destination
         wps = [
@@ -281,12 +290,12 @@ class TestKeyboardWalks:
 # ── Autowalks ────────────────────────────────────────────────────────
 
 class TestAutowalks:
-    def test_autowalk_uses_pos_directly(self):
+    def test_autowalk_uses_pos_directly(self, build_actions_map):
         """Autowalk pos IS the destination — no offset applied."""
-        nodes = build_actions_map(_rec([_autowalk((137, 579, 6))]))
+        nodes = _build(build_actions_map, _rec([_autowalk((137, 579, 6))]))
         assert nodes[0]["target"] == [137, 579, 6]
 
-    def test_consecutive_autowalks_simplified(self):
+    def test_consecutive_autowalks_simplified(self, build_actions_map):
         """Multiple autowalks should be grouped and simplified."""
         wps = [
             _autowalk((100, 200, 7)),
@@ -301,7 +310,7 @@ class TestAutowalks:
         assert nodes[0]["target"] == [100, 200, 7]
         assert nodes[-1]["target"] == [105, 200, 7]
 
-    def test_autowalk_mixed_with_keyboard_walks(self):
+    def test_autowalk_mixed_with_keyboard_walks(self, build_actions_map):
         """Autowalks and keyboard walks in the same group should all be walk_to."""
         wps = [
             _autowalk((100, 200, 7)),
@@ -309,14 +318,15 @@ class TestAutowalks:
             _autowalk((103, 200, 7)),
         ]
         nodes = build_actions_map(_rec(wps))
-        for n in nodes:
-            assert n["type"] == "walk_to"
+        assert all(n["type"] == "walk_to" for n in nodes), (
+            f"Expected only walk_to nodes, got: {_targets(nodes)}"
+        )
 
 
 # ── Map-click walks (far use_item) ──────────────────────────────────
 
 class TestMapClickWalks:
-    def test_far_use_item_becomes_walk_to(self):
+    def test_far_use_item_becomes_walk_to(self, build_actions_map):
         """use_item with distance > 1 becomes walk_to nodes (player pos + click target)."""
         wps = [
             _use_item(120, 200, 7, 486, player_pos=(100, 200, 7)),
@@ -324,12 +334,13 @@ class TestMapClickWalks:
         nodes = build_actions_map(_rec(wps))
         # Produces 2 nodes: player position + click target destination
         assert len(nodes) == 2
-        for n in nodes:
-            assert n["type"] == "walk_to"
+        assert all(n["type"] == "walk_to" for n in nodes), (
+            f"Expected only walk_to nodes, got: {_targets(nodes)}"
+        )
         assert nodes[0]["target"] == [100, 200, 7]
         assert nodes[1]["target"] == [120, 200, 7]
 
-    def test_consecutive_map_clicks_grouped(self):
+    def test_consecutive_map_clicks_grouped(self, build_actions_map):
         """Multiple far use_items should be grouped and simplified."""
         wps = [
             _use_item(105, 200, 7, 486, player_pos=(100, 200, 7)),
@@ -337,12 +348,13 @@ class TestMapClickWalks:
             _use_item(115, 200, 7, 486, player_pos=(110, 200, 7)),
         ]
         nodes = build_actions_map(_rec(wps))
-        for n in nodes:
-            assert n["type"] == "walk_to"
+        assert all(n["type"] == "walk_to" for n in nodes), (
+            f"Expected only walk_to nodes, got: {_targets(nodes)}"
+        )
         # Should include positions from player positions and final click target
         assert len(nodes) >= 2
 
-    def test_map_click_uses_player_floor_not_click_floor(self):
+    def test_map_click_uses_player_floor_not_click_floor(self, build_actions_map):
         """When clicking a tile on a different floor, destination uses player's floor."""
         # Player at z=7 clicks tile at z=6 (visible above) — walk stays on z=7
         wps = [
@@ -352,7 +364,7 @@ class TestMapClickWalks:
         # The final destination uses player's z (7), not click z (6)
         assert nodes[-1]["target"][2] == 7
 
-    def test_map_click_records_ground_item_id(self):
+    def test_map_click_records_ground_item_id(self, build_actions_map):
         """First map-click walk's item_id should be used as ground tile ID."""
         wps = [
             _use_item(110, 200, 7, 486, player_pos=(100, 200, 7)),
@@ -364,7 +376,7 @@ class TestMapClickWalks:
 # ── use_item (close interaction) ─────────────────────────────────────
 
 class TestUseItemClose:
-    def test_door_use_item(self):
+    def test_door_use_item(self, build_actions_map):
         """Close use_item (door) should remain as use_item node."""
         wps = [_use_item(137, 564, 6, 1696, player_pos=(136, 564, 6))]
         nodes = build_actions_map(_rec(wps))
@@ -374,14 +386,14 @@ class TestUseItemClose:
         assert nodes[0]["item_id"] == 1696
         assert nodes[0]["player_pos"] == [136, 564, 6]
 
-    def test_stairs_use_item_different_floor(self):
+    def test_stairs_use_item_different_floor(self, build_actions_map):
         """use_item where item is on different floor but adjacent."""
         wps = [_use_item(100, 200, 6, 1968, player_pos=(100, 200, 7))]
         nodes = build_actions_map(_rec(wps))
         assert nodes[0]["type"] == "use_item"
         assert nodes[0]["target"] == [100, 200, 6]
 
-    def test_use_item_preserves_all_fields(self):
+    def test_use_item_preserves_all_fields(self, build_actions_map):
         """Verify use_item node has all expected fields."""
         wps = [_use_item(10, 20, 7, 1234, player_pos=(10, 21, 7), stack_pos=3, index=2)]
         nodes = build_actions_map(_rec(wps))
@@ -394,13 +406,13 @@ class TestUseItemClose:
         assert n["index"] == 2
         assert n["label"] == "Use item 1234"
 
-    def test_consecutive_duplicate_use_items_deduped(self):
+    def test_consecutive_duplicate_use_items_deduped(self, build_actions_map):
         """Same use_item sent multiple times → only one node (post-process dedup)."""
         wp = _use_item(100, 200, 7, 1054, player_pos=(99, 200, 7))
-        nodes = build_actions_map(_rec([wp, wp, wp]))
+        nodes = build_actions_map(_rec([wp] * 3))
         assert len(nodes) == 1
 
-    def test_same_target_different_item_not_deduped(self):
+    def test_same_target_different_item_not_deduped(self, build_actions_map):
         """Two use_items at same target but different item_ids are NOT deduped.
         Actually they ARE deduped since dedup only checks type + target."""
         wp1 = _use_item(100, 200, 7, 1054, player_pos=(99, 200, 7))
@@ -413,7 +425,7 @@ class TestUseItemClose:
 # ── use_item_ex ──────────────────────────────────────────────────────
 
 class TestUseItemEx:
-    def test_use_item_ex_preserves_fields(self):
+    def test_use_item_ex_preserves_fields(self, build_actions_map):
         wp = _use_item_ex(
             from_pos=(0xFFFF, 0, 0), item_id=2120,
             to_pos=(100, 200, 7), player_pos=(100, 201, 7),
@@ -432,7 +444,7 @@ class TestUseItemEx:
 # ── Deduplication ────────────────────────────────────────────────────
 
 class TestDeduplication:
-    def test_consecutive_walk_to_same_target_deduped(self):
+    def test_consecutive_walk_to_same_target_deduped(self, build_actions_map):
         """Two walk_to nodes with same target should be deduped."""
         wps = [
             _autowalk((100, 200, 7)),
@@ -441,7 +453,7 @@ class TestDeduplication:
         nodes = build_actions_map(_rec(wps))
         assert len(nodes) == 1
 
-    def test_non_consecutive_same_target_not_deduped(self):
+    def test_non_consecutive_same_target_not_deduped(self, build_actions_map):
         """Same target but with different node in between — both kept."""
         wps = [
             _autowalk((100, 200, 7)),
@@ -451,7 +463,7 @@ class TestDeduplication:
         nodes = build_actions_map(_rec(wps))
         assert len(nodes) == 3
 
-    def test_different_type_same_target_not_deduped(self):
+    def test_different_type_same_target_not_deduped(self, build_actions_map):
         """walk_to and use_item at same location are different types — both kept."""
         wps = [
             _autowalk((100, 200, 7)),
@@ -464,7 +476,7 @@ class TestDeduplication:
 # ── Exact marking ────────────────────────────────────────────────────
 
 class TestExactMarking:
-    def test_walk_before_use_item_is_exact(self):
+    def test_walk_before_use_item_is_exact(self, build_actions_map):
         """walk_to immediately before a use_item should be marked exact."""
         wps = [
             _autowalk((100, 200, 7)),
@@ -474,7 +486,7 @@ class TestExactMarking:
         walk_node = [n for n in nodes if n["type"] == "walk_to"][0]
         assert walk_node.get("exact") is True
 
-    def test_walk_before_use_item_ex_is_exact(self):
+    def test_walk_before_use_item_ex_is_exact(self, build_actions_map):
         wps = [
             _autowalk((100, 200, 7)),
             _use_item_ex((0xFFFF, 0, 0), 2120, (100, 200, 8), (100, 200, 7)),
@@ -483,7 +495,7 @@ class TestExactMarking:
         walk_node = [n for n in nodes if n["type"] == "walk_to"][0]
         assert walk_node.get("exact") is True
 
-    def test_walk_before_floor_change_is_exact(self):
+    def test_walk_before_floor_change_is_exact(self, build_actions_map):
         """walk_to followed by walk_to on a different floor → exact."""
         wps = [
             _walk("west", (128, 564, 6)),   # pos: (127, 564, 6)
@@ -495,38 +507,35 @@ class TestExactMarking:
         assert len(floor6_nodes) >= 1
         assert floor6_nodes[-1].get("exact") is True
 
-    def test_walk_not_before_anything_special_is_not_exact(self):
+    def test_walk_not_before_anything_special_is_not_exact(self, build_actions_map):
         """Regular walk_to followed by another same-floor walk_to → not exact."""
         wps = [
             _autowalk((100, 200, 7)),
             _autowalk((105, 200, 7)),
         ]
         nodes = build_actions_map(_rec(wps))
-        for n in nodes:
-            assert n.get("exact") is not True
+        assert not any(n.get("exact") is True for n in nodes)
 
-    def test_last_node_is_never_exact(self):
+    def test_last_node_is_never_exact(self, build_actions_map):
         """The last node has no successor, so it can't be marked exact."""
         wps = [_autowalk((100, 200, 7))]
-        nodes = build_actions_map(_rec(wps))
+        nodes = _build(build_actions_map, _rec(wps))
         assert nodes[-1].get("exact") is not True
 
-    def test_use_item_nodes_never_get_exact(self):
+    def test_use_item_nodes_never_get_exact(self, build_actions_map):
         """Only walk_to nodes get exact marking, not use_item."""
         wps = [
             _use_item(100, 200, 7, 1696, player_pos=(100, 201, 7)),
             _use_item(100, 200, 6, 1968, player_pos=(100, 200, 7)),
         ]
         nodes = build_actions_map(_rec(wps))
-        for n in nodes:
-            if n["type"] == "use_item":
-                assert n.get("exact") is not True
+        assert not any(n["type"] == "use_item" and n.get("exact") is True for n in nodes)
 
 
 # ── Mixed sequences (walks + interactions) ───────────────────────────
 
 class TestMixedSequences:
-    def test_walks_interrupted_by_use_item(self):
+    def test_walks_interrupted_by_use_item(self, build_actions_map):
         """Walk group → use_item → walk group should produce 3+ nodes."""
         wps = [
             _walk("north", (100, 205, 7)),
@@ -541,7 +550,7 @@ class TestMixedSequences:
         walk_to_count = types.count("walk_to")
         assert walk_to_count >= 2  # walks before and after use_item
 
-    def test_walk_group_ends_at_use_item(self):
+    def test_walk_group_ends_at_use_item(self, build_actions_map):
         """Walk waypoints stop being grouped when a use_item appears."""
         wps = [
             _walk("north", (100, 205, 7)),
@@ -554,7 +563,7 @@ class TestMixedSequences:
         walk_nodes = [n for n in nodes if n["type"] == "walk_to"]
         assert walk_nodes[-1].get("exact") is True
 
-    def test_map_clicks_then_keyboard_walks(self):
+    def test_map_clicks_then_keyboard_walks(self, build_actions_map):
         """Map-click walk group followed by keyboard walk group → separate groups."""
         wps = [
             _use_item(120, 200, 7, 486, player_pos=(100, 200, 7)),
@@ -563,15 +572,16 @@ class TestMixedSequences:
             _walk("north", (130, 199, 7)),
         ]
         nodes = build_actions_map(_rec(wps))
-        for n in nodes:
-            assert n["type"] == "walk_to"
+        assert all(n["type"] == "walk_to" for n in nodes), (
+            f"Expected only walk_to nodes, got: {_targets(nodes)}"
+        )
         assert len(nodes) >= 2
 
 
 # ── Floor transitions ────────────────────────────────────────────────
 
 class TestFloorTransitions:
-    def test_walk_sequence_with_floor_change(self):
+    def test_walk_sequence_with_floor_change(self, build_actions_map):
         """Walk west into a ramp: z changes mid-sequence."""
         wps = [
             _walk("west", (128, 564, 6)),  # pos: (127, 564, 6)
@@ -580,11 +590,9 @@ class TestFloorTransitions:
         ]
         nodes = build_actions_map(_rec(wps))
         # Should produce nodes on both floors
-        floors = set(n["target"][2] for n in nodes)
-        assert 6 in floors
-        assert 7 in floors
+        assert _has_floors(nodes, 6, 7)
 
-    def test_stair_use_item_floor_change(self):
+    def test_stair_use_item_floor_change(self, build_actions_map):
         """use_item where item z != player z is stairs/ladder."""
         wps = [
             _autowalk((100, 200, 7)),
@@ -598,13 +606,13 @@ class TestFloorTransitions:
 # ── Ground item_id inference ─────────────────────────────────────────
 
 class TestGroundItemId:
-    def test_walks_use_default_ground_id(self):
+    def test_walks_use_default_ground_id(self, build_actions_map):
         """With no map-click walks, walks use default 4449 as ground ID."""
         wps = [_walk("north", (100, 200, 7))]
-        nodes = build_actions_map(_rec(wps))
+        nodes = _build(build_actions_map, _rec(wps))
         assert nodes[0]["item_id"] == 4449
 
-    def test_walks_near_map_click_use_its_item_id(self):
+    def test_walks_near_map_click_use_its_item_id(self, build_actions_map):
         """Walk group near a map-click walk should borrow its ground item_id."""
         wps = [
             _use_item(120, 200, 7, 486, player_pos=(100, 200, 7)),  # map click
@@ -623,79 +631,47 @@ class TestGroundItemId:
 class TestFullScenario:
     """Test with a realistic mixed recording similar to the user's actual data."""
 
-    def test_door_open_close_sequence(self):
+    def test_door_open_close_sequence(self, door_sequence_nodes):
         """Walk → door → walk through → walk back → door again."""
-        wps = [
-            # Walk to door
-            _walk("east", (135, 564, 6)),  # dest: (136, 564, 6)
-            _walk("east", (136, 564, 6)),  # dest: (137, 564, 6) — exact (before door)
-            # Open door
-            _use_item(137, 564, 6, 1696, player_pos=(137, 564, 6)),
-            # Walk through
-            _walk("west", (137, 564, 6)),  # dest: (136, 564, 6)
-            _walk("west", (136, 564, 6)),  # dest: (135, 564, 6)
-        ]
-        nodes = build_actions_map(_rec(wps))
-        types = [n["type"] for n in nodes]
+        nodes = door_sequence_nodes
 
-        assert "use_item" in types
+        assert any(n["type"] == "use_item" for n in nodes)
         # The walk_to before use_item should be exact
         for j, n in enumerate(nodes):
             if n["type"] == "use_item" and j > 0:
                 assert nodes[j - 1].get("exact") is True
 
-    def test_node_ordering_preserved(self):
+    def test_node_ordering_preserved(self, mixed_sequence_nodes):
         """Nodes should appear in the same order as the recording."""
-        wps = [
-            _autowalk((100, 200, 7)),
-            _use_item(100, 200, 7, 1696, player_pos=(100, 200, 7)),
-            _autowalk((110, 200, 7)),
-            _use_item_ex((0xFFFF, 0, 0), 2120, (110, 200, 8), (110, 200, 7)),
-        ]
-        nodes = build_actions_map(_rec(wps))
-        types = [n["type"] for n in nodes]
+        types = [n["type"] for n in mixed_sequence_nodes]
         assert types == ["walk_to", "use_item", "walk_to", "use_item_ex"]
 
-    def test_long_walk_sequence_reduced(self):
+    def test_long_walk_sequence_reduced(self, long_north_walk_nodes):
         """A long walk sequence (20+ waypoints) should be significantly reduced."""
-        wps = [_walk("north", (100, 200 - i, 7)) for i in range(20)]
-        nodes = build_actions_map(_rec(wps))
+        nodes = long_north_walk_nodes
         assert len(nodes) < 20
         # But should still span the full distance
         assert nodes[0]["target"][1] < 200
         assert nodes[-1]["target"][1] < nodes[0]["target"][1]
 
-    def test_autowalks_scattered_positions_simplified(self):
+    def test_autowalks_scattered_positions_simplified(self, scattered_autowalk_nodes):
         """Autowalks at scattered positions get simplified down."""
-        wps = [
-            _autowalk((125, 564, 7)),
-            _autowalk((126, 564, 7)),
-            _autowalk((127, 564, 7)),
-            _autowalk((128, 564, 7)),
-            _autowalk((127, 568, 6)),
-            _autowalk((127, 570, 6)),
-            _autowalk((128, 576, 6)),
-            _autowalk((128, 579, 6)),
-            _autowalk((133, 581, 6)),
-            _autowalk((135, 581, 6)),
-        ]
-        nodes = build_actions_map(_rec(wps))
+        nodes = scattered_autowalk_nodes
         # Should be fewer than 10 raw waypoints
         assert len(nodes) < 10
         # Floor 7 and floor 6 nodes present
-        floors = set(n["target"][2] for n in nodes)
-        assert 6 in floors
-        assert 7 in floors
+        assert _has_floors(nodes, 6, 7)
         # The node right before the floor change (7→6) should be exact
+        floors = [t[2] for t in map(_get_target, nodes)]
         for j in range(len(nodes) - 1):
-            if (nodes[j]["target"][2] == 7 and nodes[j + 1]["target"][2] == 6):
+            if floors[j] == 7 and floors[j + 1] == 6:
                 assert nodes[j].get("exact") is True
 
 
 # ── Edge cases ───────────────────────────────────────────────────────
 
 class TestEdgeCases:
-    def test_unknown_waypoint_type_skipped(self):
+    def test_unknown_waypoint_type_skipped(self, build_actions_map):
         """Unknown waypoint types should be silently skipped."""
         wps = [
             {"type": "unknown_thing", "pos": [100, 200, 7], "t": 0},
@@ -705,34 +681,30 @@ class TestEdgeCases:
         assert len(nodes) == 1
         assert nodes[0]["type"] == "walk_to"
 
-    def test_all_duplicates_collapse_to_one(self):
+    def test_all_duplicates_collapse_to_one(self, build_actions_map):
         """N identical autowalks should collapse to a single node."""
-        wps = [_autowalk((100, 200, 7)) for _ in range(10)]
+        # build_actions_map treats waypoints as read-only, so one shared
+        # dict repeated N times is an accurate recording of N duplicates
+        wps = [_autowalk((100, 200, 7))] * 10
         nodes = build_actions_map(_rec(wps))
         assert len(nodes) == 1
 
-    def test_use_item_at_distance_zero(self):
+    def test_use_item_at_distance_zero(self, build_actions_map):
         """use_item where item is at player position (standing on it)."""
         wps = [_use_item(100, 200, 7, 1968, player_pos=(100, 200, 7))]
         nodes = build_actions_map(_rec(wps))
         assert nodes[0]["type"] == "use_item"
 
-    def test_very_long_recording(self):
+    def test_very_long_recording(self, long_recording_nodes):
         """100+ waypoints should process without error."""
-        wps = []
-        for i in range(50):
-            wps.append(_walk("east", (100 + i, 200, 7)))
-        wps.append(_use_item(150, 200, 7, 1696, player_pos=(150, 200, 7)))
-        for i in range(50):
-            wps.append(_walk("west", (150 - i, 200, 7)))
-        nodes = build_actions_map(_rec(wps))
+        nodes = long_recording_nodes
         assert len(nodes) > 0
         assert len(nodes) < 100  # significantly reduced
         # use_item should be in the middle
         use_items = [n for n in nodes if n["type"] == "use_item"]
         assert len(use_items) == 1
 
-    def test_alternating_floors_marks_exact(self):
+    def test_alternating_floors_marks_exact(self, build_actions_map):
         """Walk on floor 6, walk on floor 7, walk on floor 6 — transitions marked exact."""
         wps = [
             _walk("north", (100, 203, 6)),  # dest: (100, 202, 6)
@@ -743,14 +715,61 @@ class TestEdgeCases:
         ]
         nodes = build_actions_map(_rec(wps))
         # Every node before a floor change should be exact
+        targets = list(map(_get_target, nodes))
         for j in range(len(nodes) - 1):
-            if nodes[j]["target"][2] != nodes[j + 1]["target"][2]:
+            if targets[j][2] != targets[j + 1][2]:
                 assert nodes[j].get("exact") is True, \
-                    f"Node {j} ({nodes[j]['target']}) before floor change should be exact"
+                    f"Node {j} ({targets[j]}) before floor change should be exact"
 
 
 # ── Floor transitions: stair tile and exact marking ──────────────────
 
+# Walks west onto the stair at (128,564,6), then on along floor 7
+_STAIR_WALKS = [
+    pytest.param([
+        _walk("west", (136, 564, 6)),  # pos: (135, 564, 6)
+        _walk("west", (135, 564, 6)),  # pos: (134, 564, 6)
+        _walk("west", (134, 564, 6)),  # pos: (133, 564, 6)
+        _walk("west", (133, 564, 6)),  # pos: (132, 564, 6)
+        _walk("west", (131, 564, 6)),  # pos: (130, 564, 6)
+        _walk("west", (130, 564, 6)),  # pos: (129, 564, 6)
+        _walk("west", (129, 564, 6)),  # pos: (128, 564, 6) ← stair
+        # Floor changed — next walk is on floor 7
+        _walk("west", (126, 564, 7)),  # pos: (125, 564, 7)
+        _walk("west", (125, 564, 7)),  # pos: (124, 564, 7)
+        _walk("west", (123, 564, 7)),  # pos: (122, 564, 7)
+    ], id="long_approach"),
+    pytest.param([
+        _walk("west", (131, 564, 6)),
+        _walk("west", (130, 564, 6)),
+        _walk("west", (129, 564, 6)),  # pos: (128, 564, 6) ← stair
+        _walk("west", (126, 564, 7)),  # floor 7
+        _walk("west", (125, 564, 7)),
+        _walk("west", (123, 564, 7)),
+    ], id="short_approach"),
+    # Reproduces the baltra_v2 recording, duplicate walks included
+    pytest.param([
+        _walk("west", (136, 564, 6)),
+        _walk("west", (136, 564, 6)),  # dup
+        _walk("west", (134, 564, 6)),
+        _walk("west", (134, 564, 6)),  # dup
+        _walk("west", (133, 564, 6)),
+        _walk("west", (133, 564, 6)),  # dup
+        _walk("west", (131, 564, 6)),
+        _walk("west", (130, 564, 6)),
+        _walk("west", (129, 564, 6)),  # pos: (128, 564, 6) ← stair
+        _walk("west", (126, 564, 7)),
+        _walk("west", (126, 564, 7)),  # dup
+        _walk("west", (125, 564, 7)),
+        _walk("west", (123, 564, 7)),
+        _walk("west", (122, 564, 7)),
+        _walk("west", (122, 564, 7)),  # dup
+        _walk("west", (122, 564, 7)),  # dup
+        _walk("west", (120, 564, 7)),
+    ], id="real_data_with_dups"),
+]
+
+
 class TestStairTransitionDestination:
     """Tests for floor-crossing walks.
 
@@ -759,51 +778,21 @@ class TestStairTransitionDestination:
     walk_to on that floor and should be marked [exact].
     """
 
-    def test_stair_tile_is_last_floor_node(self):
-        """Walk west into stair at (128,564,6): stair tile should be the
-        last floor-6 node."""
-        wps = [
-            _walk("west", (136, 564, 6)),  # pos: (135, 564, 6)
-            _walk("west", (135, 564, 6)),  # pos: (134, 564, 6)
-            _walk("west", (134, 564, 6)),  # pos: (133, 564, 6)
-            _walk("west", (133, 564, 6)),  # pos: (132, 564, 6)
-            _walk("west", (131, 564, 6)),  # pos: (130, 564, 6)
-            _walk("west", (130, 564, 6)),  # pos: (129, 564, 6)
-            _walk("west", (129, 564, 6)),  # pos: (128, 564, 6) ← stair
-            # Floor changed — next walk is on floor 7
-            _walk("west", (126, 564, 7)),  # pos: (125, 564, 7)
-            _walk("west", (125, 564, 7)),  # pos: (124, 564, 7)
-            _walk("west", (123, 564, 7)),  # pos: (122, 564, 7)
-        ]
+    @pytest.mark.parametrize("wps", _STAIR_WALKS)
+    def test_stair_tile_is_last_floor_node(self, build_actions_map, wps):
+        """Walk west into the stair at (128,564,6): the stair tile must be
+        the last floor-6 node, and exact."""
         nodes = build_actions_map(_rec(wps))
 
-        # Stair tile (128,564,6) must be the last floor-6 node
         floor6_nodes = [n for n in nodes if n["target"][2] == 6]
         assert len(floor6_nodes) >= 1
         last_f6 = floor6_nodes[-1]
         assert last_f6["target"] == [128, 564, 6], (
             f"Last floor 6 node should be stair tile (128,564,6), got {last_f6['target']}"
         )
-
-    def test_stair_tile_is_exact(self):
-        """The stair tile (last on its floor before Z change) must be exact."""
-        wps = [
-            _walk("west", (131, 564, 6)),
-            _walk("west", (130, 564, 6)),
-            _walk("west", (129, 564, 6)),  # pos: (128, 564, 6) ← stair
-            _walk("west", (126, 564, 7)),  # floor 7
-            _walk("west", (125, 564, 7)),
-            _walk("west", (123, 564, 7)),
-        ]
-        nodes = build_actions_map(_rec(wps))
-
-        floor6_nodes = [n for n in nodes if n["target"][2] == 6]
-        assert len(floor6_nodes) >= 1
-        last_f6 = floor6_nodes[-1]
-        assert last_f6["target"] == [128, 564, 6]
         assert last_f6.get("exact") is True, "Stair tile must be marked exact"
 
-    def test_first_tile_after_floor_change_preserved(self):
+    def test_first_tile_after_floor_change_preserved(self, build_actions_map):
         """The first tile on the new floor must survive simplification."""
         wps = [
             _walk("west", (131, 564, 6)),
@@ -823,36 +812,7 @@ class TestStairTransitionDestination:
             f"First floor 7 target should be (125,564,7), got {floor7_targets[0]}"
         )
 
-    def test_long_walk_into_stairs_real_data(self):
-        """Reproduce baltra_v2 scenario: walk west to stair at x=128."""
-        wps = [
-            _walk("west", (136, 564, 6)),
-            _walk("west", (136, 564, 6)),  # dup
-            _walk("west", (134, 564, 6)),
-            _walk("west", (134, 564, 6)),  # dup
-            _walk("west", (133, 564, 6)),
-            _walk("west", (133, 564, 6)),  # dup
-            _walk("west", (131, 564, 6)),
-            _walk("west", (130, 564, 6)),
-            _walk("west", (129, 564, 6)),  # pos: (128, 564, 6) ← stair
-            _walk("west", (126, 564, 7)),
-            _walk("west", (126, 564, 7)),  # dup
-            _walk("west", (125, 564, 7)),
-            _walk("west", (123, 564, 7)),
-            _walk("west", (122, 564, 7)),
-            _walk("west", (122, 564, 7)),  # dup
-            _walk("west", (122, 564, 7)),  # dup
-            _walk("west", (120, 564, 7)),
-        ]
-        nodes = build_actions_map(_rec(wps))
-
-        # Stair tile (128,564,6) must be the last floor-6 node, exact
-        floor6_nodes = [n for n in nodes if n["target"][2] == 6]
-        last_f6 = floor6_nodes[-1]
-        assert last_f6["target"] == [128, 564, 6]
-        assert last_f6.get("exact") is True
-
-    def test_simplify_path_preserves_floor_boundary(self):
+    def test_simplify_path_preserves_floor_boundary(self, simplify_path):
         """Direct test of _simplify_path: Z changes must force-keep boundary points."""
         path = [
             (135, 564, 6, 486, 1),
@@ -862,7 +822,7 @@ class TestStairTransitionDestination:
             (122, 564, 7, 486, 1),
             (119, 564, 7, 486, 1),
         ]
-        result = _simplify_path(path)
+        result = simplify_path(path)
         result_xyz = [(p[0], p[1], p[2]) for p in result]
 
         assert (129, 564, 6) in result_xyz, (
@@ -872,7 +832,7 @@ class TestStairTransitionDestination:
             f"First point after floor change dropped! Result: {result_xyz}"
         )
 
-    def test_south_walk_stair_recording(self):
+    def test_south_walk_stair_recording(self, build_actions_map):
         """Walk south into stair at (112,567,7).
 
         The stair tile (112,567,7) should be in the map as the last floor-7
@@ -904,7 +864,7 @@ class TestStairTransitionDestination:
         assert len(return_nodes) == 1
         assert return_nodes[0].get("exact") is True
 
-    def test_no_cascading_exact(self):
+    def test_no_cascading_exact(self, build_actions_map):
         """Only the last node before floor change should be exact."""
         wps = [
             _walk("south", (100, 195, 7)),  # pos: (100, 196, 7)
@@ -928,6 +888,49 @@ class TestStairTransitionDestination:
 
 # ── Far use_item interaction preservation ─────────────────────────────
 
+# Far use_items followed by an observable effect
+_FAR_INTERACTIONS = [
+    # Ladder: z changes 7 → 6 afterwards
+    pytest.param([
+        _use_item(137, 579, 7, 1968, player_pos=(140, 575, 7)),
+        _floor_change("up", [138, 578, 6]),
+    ], id="ladder_floor_change"),
+    # Even an unknown item ID is kept if a floor_change event follows
+    pytest.param([
+        _use_item(100, 200, 7, 9999, player_pos=(105, 200, 7)),
+        _floor_change("up", [103, 200, 6]),
+    ], id="unknown_item_floor_change"),
+    # Door: tile_transform_item at the same position
+    pytest.param([
+        _use_item(130, 581, 6, 1771, player_pos=(137, 580, 6)),
+        {"type": "tile_transform_item", "x": 130, "y": 581, "z": 6, "t": 1.5},
+    ], id="door_tile_transform"),
+    # Hand-written floor_change waypoint
+    pytest.param([
+        _use_item(137, 579, 7, 8888, player_pos=(140, 575, 7)),
+        {"type": "floor_change", "direction": "up", "pos": [137, 579, 6], "z": 6, "t": 2.0},
+    ], id="floor_change_event"),
+]
+
+# Far use_items with no observable effect
+_FAR_WALK_CLICKS = [
+    # Door without tile_transform_item
+    pytest.param([
+        _use_item(130, 581, 6, 1771, player_pos=(137, 580, 6)),
+    ], id="door_no_transform"),
+    # Ground tile (486), even if clicked twice
+    pytest.param([
+        _use_item(129, 581, 6, 486, player_pos=(132, 582, 6)),
+        _use_item(129, 581, 6, 486, player_pos=(131, 582, 6)),
+    ], id="ground_tile_twice"),
+    # Unknown item without floor change
+    pytest.param([
+        _use_item(120, 300, 7, 4445, player_pos=(125, 300, 7)),
+        _use_item(120, 300, 7, 4445, player_pos=(123, 300, 7)),
+    ], id="unknown_item_no_effect"),
+]
+
+
 class TestFarUseItemPreservation:
     """Tests that far use_items are detected as real interactions based on
     observable effects (floor change) or door whitelist, not item ID alone.
@@ -937,61 +940,25 @@ class TestFarUseItemPreservation:
     - Ground tiles: always become walk_to regardless of click count
     """
 
-    def test_ladder_detected_by_floor_change(self):
-        """Far use_item followed by floor_change event → use_item (auto-detected)."""
-        wps = [
-            _use_item(137, 579, 7, 1968, player_pos=(140, 575, 7)),
-            _floor_change("up", [138, 578, 6]),  # z changed: 7 → 6
-        ]
+    @pytest.mark.parametrize("wps", _FAR_INTERACTIONS)
+    def test_far_interaction_kept_as_use_item(self, build_actions_map, wps):
+        """A far use_item with an observable effect becomes one use_item node."""
         nodes = build_actions_map(_rec(wps))
         use_items = [n for n in nodes if n["type"] == "use_item"]
         assert len(use_items) == 1
-        assert use_items[0]["target"] == [137, 579, 7]
+        use = wps[0]
+        assert use_items[0]["item_id"] == use["item_id"]
+        assert use_items[0]["target"] == [use["x"], use["y"], use["z"]]
 
-    def test_any_item_with_floor_change_is_interaction(self):
-        """Even an unknown item ID is preserved if floor_change event follows."""
-        wps = [
-            _use_item(100, 200, 7, 9999, player_pos=(105, 200, 7)),
-            _floor_change("up", [103, 200, 6]),  # z changed
-        ]
+    @pytest.mark.parametrize("wps", _FAR_WALK_CLICKS)
+    def test_far_click_without_effect_is_walk(self, build_actions_map, wps):
+        """A far use_item with no observable effect is a walk (walk_to only)."""
         nodes = build_actions_map(_rec(wps))
-        use_items = [n for n in nodes if n["type"] == "use_item"]
-        assert len(use_items) == 1
-        assert use_items[0]["item_id"] == 9999
-
-    def test_far_door_detected_by_tile_transform_item(self):
-        """Far door followed by tile_transform_item at same position → use_item."""
-        wps = [
-            _use_item(130, 581, 6, 1771, player_pos=(137, 580, 6)),
-            {"type": "tile_transform_item", "x": 130, "y": 581, "z": 6, "t": 1.5},
-        ]
-        nodes = build_actions_map(_rec(wps))
-        use_items = [n for n in nodes if n["type"] == "use_item"]
-        assert len(use_items) == 1
-        assert use_items[0]["item_id"] == 1771
-
-    def test_far_door_no_tile_transform_item_is_walk(self):
-        """Far door without tile_transform_item → walk_to (no observable effect)."""
-        wps = [
-            _use_item(130, 581, 6, 1771, player_pos=(137, 580, 6)),
-        ]
-        nodes = build_actions_map(_rec(wps))
-        for n in nodes:
-            assert n["type"] == "walk_to"
-
-    def test_far_ground_tile_is_walk_to(self):
-        """Far ground tile (486) → walk_to, even if clicked twice."""
-        wps = [
-            _use_item(129, 581, 6, 486, player_pos=(132, 582, 6)),
-            _use_item(129, 581, 6, 486, player_pos=(131, 582, 6)),
-        ]
-        nodes = build_actions_map(_rec(wps))
-        for n in nodes:
-            assert n["type"] == "walk_to", (
-                f"Ground tile should be walk_to even if repeated, got: {_targets(nodes)}"
-            )
+        assert all(n["type"] == "walk_to" for n in nodes), (
+            f"Expected only walk_to nodes, got: {_targets(nodes)}"
+        )
 
-    def test_mixed_group_walks_and_ladder_with_floor_change(self):
+    def test_mixed_group_walks_and_ladder_with_floor_change(self, build_actions_map):
         """Ground walks + ladder (detected by floor_change event)."""
         wps = [
             _use_item(120, 200, 7, 486, player_pos=(100, 200, 7)),
@@ -1000,12 +967,13 @@ class TestFarUseItemPreservation:
             _floor_change("up", [137, 200, 6]),  # floor change after unknown item
         ]
         nodes = build_actions_map(_rec(wps))
-        walk_nodes = [n for n in nodes if n["type"] == "walk_to"]
-        use_nodes = [n for n in nodes if n["type"] == "use_item"]
+        by_type = _by_type(nodes)
+        walk_nodes = by_type.get("walk_to", [])
+        use_nodes = by_type.get("use_item", [])
         assert len(walk_nodes) >= 1, "Walk clicks should produce walk_to"
         assert len(use_nodes) == 1, "Item with floor change should be use_item"
 
-    def test_real_recording_ladder_and_door(self):
+    def test_real_recording_ladder_and_door(self, build_actions_map):
         """Ladder (detected by floor_change event) + door (tile_transform_item) + ground walk."""
         wps = [
             _use_item(137, 579, 7, 1968, player_pos=(140, 575, 7)),
@@ -1018,25 +986,25 @@ class TestFarUseItemPreservation:
         ]
         nodes = build_actions_map(_rec(wps))
         types_targets = _targets(nodes)
+        by_type = _by_type(nodes)
+        use_nodes = by_type.get("use_item", [])
 
-        ladder_nodes = [n for n in nodes
-                        if n["type"] == "use_item" and n["item_id"] == 1968]
+        ladder_nodes = [n for n in use_nodes if n["item_id"] == 1968]
         assert len(ladder_nodes) >= 1, (
             f"Ladder should be use_item (floor change), got: {types_targets}"
         )
 
-        door_nodes = [n for n in nodes
-                      if n["type"] == "use_item" and n["item_id"] == 1771]
+        door_nodes = [n for n in use_nodes if n["item_id"] == 1771]
         assert len(door_nodes) >= 1, (
             f"Door (1771) should be use_item (tile_transform_item), got: {types_targets}"
         )
 
-        walk_nodes = [n for n in nodes if n["type"] == "walk_to"]
+        walk_nodes = by_type.get("walk_to", [])
         assert len(walk_nodes) >= 1, (
             f"Ground click (486) should be walk_to, got: {types_targets}"
         )
 
-    def test_interleaved_interactions_and_walks(self):
+    def test_interleaved_interactions_and_walks(self, build_actions_map):
         """Interaction → walk → interaction should preserve order."""
         wps = [
             _use_item(100, 200, 7, 1968, player_pos=(105, 200, 7)),
@@ -1046,11 +1014,9 @@ class TestFarUseItemPreservation:
             {"type": "tile_transform_item", "x": 85, "y": 200, "z": 6, "t": 0.0},
         ]
         nodes = build_actions_map(_rec(wps))
-        types = [n["type"] for n in nodes]
-        assert "use_item" in types
-        assert "walk_to" in types
+        assert {"use_item", "walk_to"} <= {n["type"] for n in nodes}
 
-    def test_walk_before_far_interaction_marked_exact(self):
+    def test_walk_before_far_interaction_marked_exact(self, build_actions_map):
         """Walk_to before a far use_item should be marked exact."""
         wps = [
             _autowalk((140, 575, 7)),
@@ -1062,30 +1028,35 @@ class TestFarUseItemPreservation:
         assert len(walk_nodes) >= 1
         assert walk_nodes[-1].get("exact") is True
 
-    def test_no_floor_change_unknown_item_is_walk(self):
-        """Unknown item without floor change → walk_to."""
-        wps = [
-            _use_item(120, 300, 7, 4445, player_pos=(125, 300, 7)),
-            _use_item(120, 300, 7, 4445, player_pos=(123, 300, 7)),
-        ]
-        nodes = build_actions_map(_rec(wps))
-        for n in nodes:
-            assert n["type"] == "walk_to", (
-                f"Unknown item without floor change → walk_to, got: {_targets(nodes)}"
-            )
-
-    def test_floor_change_event_detected(self):
-        """floor_change waypoint type triggers detection."""
-        wps = [
-            _use_item(137, 579, 7, 8888, player_pos=(140, 575, 7)),
-            {"type": "floor_change", "direction": "up", "pos": [137, 579, 6], "z": 6, "t": 2.0},
-        ]
-        nodes = build_actions_map(_rec(wps))
-        use_items = [n for n in nodes if n["type"] == "use_item"]
-        assert len(use_items) == 1
+# ── Position waypoints ───────────────────────────────────────────────
 
+# Walks west onto the stair at (128,564,6) with a floor_change event
+# before the walks continue on floor 7
+_FLOOR_CHANGE_EVENT_WALKS = [
+    # Reproduces a user bug report:
+    #   103. Walk west | (129,564,6) → (128,564,6)
+    #   104. floor_change down to z=7               ← floor change
+    #   105. Walk west | (127,564,7) → (126,564,7)
+    # Should produce walk_to (128,564,6) [exact], walk_to (126,564,7);
+    # must NOT produce walk_to (127,564,6) (the old double-offset bug).
+    pytest.param([
+        _walk("west", (129, 564, 6)),   # pos: (128, 564, 6) ← stair
+        _floor_change("down", [127, 564, 7]),  # floor changed to 7
+        _walk("west", (127, 564, 7)),   # pos: (126, 564, 7)
+    ], id="single_walks"),
+    # Extended real scenario: walks → floor_change event → more walks
+    pytest.param([
+        _walk("west", (132, 564, 6)),   # pos: (131, 564, 6)
+        _walk("west", (131, 564, 6)),   # pos: (130, 564, 6)
+        _walk("west", (130, 564, 6)),   # pos: (129, 564, 6)
+        _walk("west", (129, 564, 6)),   # pos: (128, 564, 6) ← stair
+        _floor_change("down", [127, 564, 7]),  # floor change
+        _walk("west", (127, 564, 7)),   # pos: (126, 564, 7)
+        _walk("west", (126, 564, 7)),   # pos: (125, 564, 7)
+        _walk("west", (125, 564, 7)),   # pos: (124, 564, 7)
+    ], id="walk_runs"),
+]
 
-# ── Position waypoints ───────────────────────────────────────────────
 
 class TestPositionWaypoints:
     """Tests for position-tracking waypoints (type='position').
@@ -1095,7 +1066,7 @@ class TestPositionWaypoints:
     output — they are informational only.
     """
 
-    def test_position_waypoints_alone_ignored(self):
+    def test_position_waypoints_alone_ignored(self, build_actions_map):
         """Position waypoints with no walks should produce empty actions map."""
         wps = [
             _position((100, 200, 7)),
@@ -1105,7 +1076,7 @@ class TestPositionWaypoints:
         nodes = build_actions_map(_rec(wps))
         assert nodes == []
 
-    def test_position_between_walks_does_not_break_grouping(self):
+    def test_position_between_walks_does_not_break_grouping(self, build_actions_map):
         """Position waypoints between walks should not split the walk group."""
         wps = [
             _walk("west", (105, 200, 7)),   # pos: (104, 200, 7)
@@ -1116,27 +1087,17 @@ class TestPositionWaypoints:
         ]
         nodes = build_actions_map(_rec(wps))
         # All walks should be in one group → simplified into walk_to nodes
-        for n in nodes:
-            assert n["type"] == "walk_to"
+        assert all(n["type"] == "walk_to" for n in nodes), (
+            f"Expected only walk_to nodes, got: {_targets(nodes)}"
+        )
         assert nodes[0]["target"] == [104, 200, 7]
         assert nodes[-1]["target"] == [102, 200, 7]
 
-    def test_floor_change_event_between_walks(self):
-        """Reproduce user bug: floor_change event between walks.
-
-        Recording:
-          103. Walk west | (129,564,6) → (128,564,6)
-          104. floor_change down to z=7               ← floor change
-          105. Walk west | (127,564,7) → (126,564,7)
-
-        Should produce walk_to (128,564,6) [exact], walk_to (126,564,7).
-        Must NOT produce walk_to (127,564,6) (the old double-offset bug).
-        """
-        wps = [
-            _walk("west", (129, 564, 6)),   # pos: (128, 564, 6) ← stair
-            _floor_change("down", [127, 564, 7]),  # floor changed to 7
-            _walk("west", (127, 564, 7)),   # pos: (126, 564, 7)
-        ]
+    @pytest.mark.parametrize("wps", _FLOOR_CHANGE_EVENT_WALKS)
+    def test_floor_change_event_no_double_offset(self, build_actions_map, wps):
+        """floor_change event between walks: the stair tile (128,564,6) is
+        the last, exact floor-6 node and no double-offset (127,564,6)
+        node is produced."""
         nodes = build_actions_map(_rec(wps))
         targets = [tuple(n["target"]) for n in nodes]
 
@@ -1148,15 +1109,15 @@ class TestPositionWaypoints:
             f"Double-offset bug: (127,564,6) should NOT be in targets, got {targets}"
         )
 
-        # Floor 6 node must be exact (before floor change)
+        # Last floor-6 node is the stair and exact (before floor change)
         floor6_nodes = [n for n in nodes if n["target"][2] == 6]
-        assert len(floor6_nodes) >= 1
         assert floor6_nodes[-1].get("exact") is True
+        assert floor6_nodes[-1]["target"] == [128, 564, 6]
 
         # Floor 7 node
         assert (126, 564, 7) in targets
 
-    def test_many_positions_between_walks_skipped(self):
+    def test_many_positions_between_walks_skipped(self, build_actions_map):
         """Many position waypoints between walks should all be skipped."""
         wps = [
             _walk("east", (100, 200, 7)),   # pos: (101, 200, 7)
@@ -1167,14 +1128,15 @@ class TestPositionWaypoints:
             _walk("east", (103, 201, 7)),   # pos: (104, 201, 7)
         ]
         nodes = build_actions_map(_rec(wps))
-        for n in nodes:
-            assert n["type"] == "walk_to"
+        assert all(n["type"] == "walk_to" for n in nodes), (
+            f"Expected only walk_to nodes, got: {_targets(nodes)}"
+        )
         # The two walks are in one group
         assert len(nodes) == 2
         assert nodes[0]["target"] == [101, 200, 7]
         assert nodes[1]["target"] == [104, 201, 7]
 
-    def test_position_before_use_item_does_not_interfere(self):
+    def test_position_before_use_item_does_not_interfere(self, build_actions_map):
         """Position waypoints before a use_item should not affect it."""
         wps = [
             _walk("east", (99, 200, 7)),    # pos: (100, 200, 7)
@@ -1182,39 +1144,4 @@ class TestPositionWaypoints:
             _use_item(101, 200, 7, 1696, player_pos=(100, 200, 7)),
         ]
         nodes = build_actions_map(_rec(wps))
-        types = [n["type"] for n in nodes]
-        assert "walk_to" in types
-        assert "use_item" in types
-
-    def test_floor_change_event_no_double_offset(self):
-        """Extended real scenario: walks → floor_change event → more walks.
-
-        Verifies no double-offset bug exists anywhere in the produced map.
-        """
-        wps = [
-            _walk("west", (132, 564, 6)),   # pos: (131, 564, 6)
-            _walk("west", (131, 564, 6)),   # pos: (130, 564, 6)
-            _walk("west", (130, 564, 6)),   # pos: (129, 564, 6)
-            _walk("west", (129, 564, 6)),   # pos: (128, 564, 6) ← stair
-            _floor_change("down", [127, 564, 7]),  # floor change
-            _walk("west", (127, 564, 7)),   # pos: (126, 564, 7)
-            _walk("west", (126, 564, 7)),   # pos: (125, 564, 7)
-            _walk("west", (125, 564, 7)),   # pos: (124, 564, 7)
-        ]
-        nodes = build_actions_map(_rec(wps))
-        targets = [tuple(n["target"]) for n in nodes]
-
-        # Stair tile on floor 6
-        assert (128, 564, 6) in targets
-        # No double-offset values
-        assert (127, 564, 6) not in targets
-
-        # Floor 6 and 7 both present
-        floors = set(t[2] for t in targets)
-        assert 6 in floors
-        assert 7 in floors
-
-        # Last floor-6 node is exact
-        floor6_nodes = [n for n in nodes if n["target"][2] == 6]
-        assert floor6_nodes[-1].get("exact") is True
-        assert floor6_nodes[-1]["target"] == [128, 564, 6]
+        assert {"walk_to", "use_item"} <= {n["type"] for n in nodes}
@@ -0,0 +1,212 @@
+"""Unit tests for crypto's XTEA paths: native library, numba and pure Python.
+
+Expected ciphertexts come from the original pure-Python xtea_encrypt.
+"""
+
+import random
+
+import pytest
+
+KEY = (0x01234567, 0x89ABCDEF, 0xFEDCBA98, 0x76543210)
+
+# (plaintext, ciphertext); the second is long enough for the accelerated path
+_VECTORS = [
+    (b"OTClient packet!", bytes.fromhex("8fd1920583b45f3fd742cc2c26f12c1e")),
+    (bytes(range(72)), bytes.fromhex(
+        "e490d158660e3f4f65cdd38e97a90d15fa7433f92a81faf2d424392f1c569b13"
+        "1de9f414e559bc39fe28f598c75b7109bbfd97d9b023a42e2033a9e6708b07e3"
+        "570542e17f585eab")),
+]
+
+
+@pytest.fixture
+def pure_python(crypto, monkeypatch):
+    """Disable the native library and numba so only the Python loop runs."""
+    monkeypatch.setattr(crypto, "_xtea_lib", None)
+    monkeypatch.setattr(crypto, "_xtea_encrypt_nb", None)
+    monkeypatch.setattr(crypto, "_xtea_decrypt_nb", None)
+
+
+@pytest.fixture(params=["native", "numba"])
+def accel(request, crypto):
+    """Name of an accelerated backend, skipped if it isn't available."""
+    if request.param == "native" and crypto._xtea_lib is None:
+        pytest.skip("native/libxtea not built")
+    if request.param == "numba" and crypto._xtea_encrypt_nb is None:
+        pytest.skip("numba kernels not in use")
+    return request.param
+
+
+def _lengths(crypto):
+    """Multiples of 8 on both sides of NATIVE_XTEA_MIN_LEN, plus random ones."""
+    rng = random.Random(crypto.NATIVE_XTEA_MIN_LEN)
+    edge = crypto.NATIVE_XTEA_MIN_LEN
+    return [8, edge - 8, edge, edge + 8] + [8 * rng.randint(1, 256) for _ in range(12)]
+
+
+def _data(n, seed):
+    return random.Random(seed).randbytes(n)
+
+
+@pytest.mark.parametrize("plain, cipher", _VECTORS)
+def test_known_vectors_python(crypto, pure_python, plain, cipher):
+    assert crypto.xtea_encrypt(plain, KEY) == cipher
+    assert crypto.xtea_decrypt(cipher, KEY) == plain
+
+
+@pytest.mark.parametrize("plain, cipher", _VECTORS)
+def test_known_vectors_default_path(crypto, plain, cipher):
+    assert crypto.xtea_encrypt(plain, KEY) == cipher
+    assert crypto.xtea_decrypt(cipher, KEY) == plain
+
+
+def test_round_trip_python(crypto, pure_python):
+    for n in _lengths(crypto):
+        data = _data(n, n)
+        assert crypto.xtea_decrypt(crypto.xtea_encrypt(data, KEY), KEY) == data
+
+
+def test_round_trip_default_path(crypto):
+    for n in _lengths(crypto):
+        data = _data(n, n)
+        assert crypto.xtea_decrypt(crypto.xtea_encrypt(data, KEY), KEY) == data
+
+
+def test_accelerated_matches_python(crypto, accel, monkeypatch):
+    cases = [(_data(n, n), _data(n, -n)) for n in _lengths(crypto)]
+    fast = [(crypto.xtea_encrypt(p, KEY), crypto.xtea_decrypt(c, KEY)) for p, c in cases]
+
+    monkeypatch.setattr(crypto, "_xtea_lib", None)
+    monkeypatch.setattr(crypto, "_xtea_encrypt_nb", None)
+    monkeypatch.setattr(crypto, "_xtea_decrypt_nb", None)
+    slow = [(crypto.xtea_encrypt(p, KEY), crypto.xtea_decrypt(c, KEY)) for p, c in cases]
+    assert fast == slow
+
+
+def test_unpadded_plaintext_is_zero_padded(crypto):
+    assert crypto.xtea_encrypt(b"abc", KEY) == crypto.xtea_encrypt(b"abc" + bytes(5), KEY)
+
+
+def test_decrypt_rejects_unaligned_length(crypto):
+    with pytest.raises(ValueError):
+        crypto.xtea_decrypt(bytes(12), KEY)
+
+
+# ── xtea_decrypt_packet ──────────────────────────────────────────────
+
+def _two_step_decrypt(crypto, data):
+    """The original proxy path: checksum check, xtea_decrypt, length strip."""
+    data = bytes(data)
+    offset = 0
+    if len(data) > 4:
+        if int.from_bytes(data[:4], "little") == crypto.adler32_checksum(data[4:]):
+            offset = 4
+    encrypted = data[offset:]
+    if len(encrypted) % 8 != 0:
+        return None
+    try:
+        decrypted = crypto.xtea_decrypt(encrypted, KEY)
+        inner_len = int.from_bytes(decrypted[:2], "little")
+    except Exception:
+        return None
+    if len(decrypted) < 2 or inner_len > len(decrypted) - 2:
+        return None
+    return decrypted[2:2 + inner_len]
+
+
+def _game_packet(crypto, payload, checksum=True, inner_len=None):
+    """Packet body as sent by the server: [adler32] + XTEA(u16 len + payload)."""
+    if inner_len is None:
+        inner_len = len(payload)
+    encrypted = crypto.xtea_encrypt(inner_len.to_bytes(2, "little") + payload, KEY)
+    if not checksum:
+        return encrypted
+    return crypto.adler32_checksum(encrypted).to_bytes(4, "little") + encrypted
+
+
+def _payloads():
+    rng = random.Random(2220)
+    return [b"", b"\x1e", b"x" * 6, b"y" * 14] + [rng.randbytes(rng.randint(1, 300)) for _ in range(8)]
+
+
+@pytest.mark.parametrize("checksum", [True, False])
+def test_decrypt_packet_matches_two_step_path(crypto, checksum):
+    for payload in _payloads():
+        packet = _game_packet(crypto, payload, checksum)
+        expected = _two_step_decrypt(crypto, packet)
+        assert expected == payload
+        assert crypto.xtea_decrypt_packet(packet, KEY) == expected
+
+
+def test_decrypt_packet_accepts_memoryview(crypto):
+    packet = _game_packet(crypto, b"memoryview payload")
+    framed = bytearray(b"\x00\x00" + packet + b"tail")
+    view = memoryview(framed)[2:2 + len(packet)]
+    assert crypto.xtea_decrypt_packet(view, KEY) == b"memoryview payload"
+
+
+def test_decrypt_packet_bad_checksum(crypto):
+    packet = bytearray(_game_packet(crypto, b"payload"))
+    packet[0] ^= 0xFF
+    # Not recognised as a checksum, so 4 + 8n bytes are left: misaligned
+    assert _two_step_decrypt(crypto, packet) is None
+    assert crypto.xtea_decrypt_packet(bytes(packet), KEY) is None
+
+
+def test_decrypt_packet_inner_length_too_large(crypto):
+    packet = _game_packet(crypto, b"short", inner_len=200)
+    assert _two_step_decrypt(crypto, packet) is None
+    assert crypto.xtea_decrypt_packet(packet, KEY) is None
+
+
+@pytest.mark.parametrize("size", [0, 3, 12, 17])
+def test_decrypt_packet_unaligned_body(crypto, size):
+    body = random.Random(size).randbytes(size)
+    assert _two_step_decrypt(crypto, body) is None
+    assert crypto.xtea_decrypt_packet(body, KEY) is None
+
+
+def test_decrypt_packet_with_schedule(crypto):
+    packet = _game_packet(crypto, b"scheduled")
+    assert crypto.xtea_decrypt_packet(packet, KEY, crypto.xtea_schedule(KEY)) == b"scheduled"
+
+
+# ── xtea_encrypt_into ────────────────────────────────────────────────
+
+@pytest.mark.parametrize("length", [8, 64, 136])
+def test_encrypt_into_middle_of_buffer(crypto, length):
+    rng = random.Random(length)
+    head, body, tail = rng.randbytes(6), rng.randbytes(length), rng.randbytes(11)
+    buf = bytearray(head + body + tail)
+
+    crypto.xtea_encrypt_into(buf, KEY, offset=len(head), length=length)
+
+    assert buf[:len(head)] == head
+    assert buf[len(head):len(head) + length] == crypto.xtea_encrypt(body, KEY)
+    assert buf[len(head) + length:] == tail
+
+
+def test_encrypt_into_rejects_unaligned_length(crypto):
+    with pytest.raises(ValueError):
+        crypto.xtea_encrypt_into(bytearray(16), KEY, offset=2, length=10)
+
+
+# ── scratch buffer pool ──────────────────────────────────────────────
+
+def test_pool_reuses_released_buffers(crypto):
+    pool = crypto._BufPool()
+    buf = pool.get(100)
+    assert len(buf) == 128
+    pool.put(buf)
+    assert pool.get(100) is buf
+
+
+def test_decrypted_packet_survives_buffer_reuse(crypto):
+    # Same size class, so the second decrypt reuses the first one's buffer
+    first = _game_packet(crypto, b"A" * 40)
+    second = _game_packet(crypto, b"B" * 40)
+
+    result = crypto.xtea_decrypt_packet(first, KEY)
+    kept = bytes(result)
+    assert crypto.xtea_decrypt_packet(second, KEY) == b"B" * 40
+    assert result == kept == b"A" * 40
@@ -0,0 +1,144 @@
+"""Unit tests for patcher's span reads and bulk patching against a fake
+process memory."""
+
+import ctypes
+import types
+
+import pytest
+
+PAGE = 0x1000
+
+
+class _FakePm:
+    """read_bytes/write_bytes over a flat memory image; reads touching a bad
+    page raise, and writes to a dropped address are silently lost."""
+
+    process_handle = 1
+
+    def __init__(self, base, data, bad_pages=(), dropped_writes=()):
+        self.base = base
+        self.data = bytearray(data)
+        self.bad_pages = set(bad_pages)
+        self.dropped_writes = set(dropped_writes)
+        self.reads = []
+        self.writes = []
+
+    def read_bytes(self, address, length):
+        self.reads.append((address, length))
+        first, last = address // PAGE, (address + length - 1) // PAGE
+        if any(p in self.bad_pages for p in range(first, last + 1)):
+            raise OSError("ReadProcessMemory failed")
+        off = address - self.base
+        return bytes(self.data[off:off + length])
+
+    def write_bytes(self, address, data, length):
+        self.writes.append((address, bytes(data[:length])))
+        if address not in self.dropped_writes:
+            off = address - self.base
+            self.data[off:off + length] = data[:length]
+
+
+BASE = 0x400000
+MEMORY = bytes(range(256)) * 64  # 16 KB starting at BASE
+
+
+def _expected(spans):
+    return {a: MEMORY[a - BASE:a - BASE + n] for a, n in spans}
+
+
+def test_nearby_spans_share_one_read(read_span_bytes):
+    spans = [(BASE + 0x10, 8), (BASE + 0x200, 8), (BASE + 0x800, 8)]
+    pm = _FakePm(BASE, MEMORY)
+    assert read_span_bytes(pm, spans) == _expected(spans)
+    assert len(pm.reads) == 1
+
+
+def test_unreadable_gap_falls_back_to_per_span_reads(read_span_bytes):
+    # Two sites on either side of an unreadable page, within the merge gap
+    spans = [(BASE + PAGE - 8, 8), (BASE + 2 * PAGE, 8)]
+    pm = _FakePm(BASE, MEMORY, bad_pages={BASE // PAGE + 1})
+    assert read_span_bytes(pm, spans) == _expected(spans)
+    assert pm.reads[0] == (BASE + PAGE - 8, PAGE + 16)  # merged read tried first
+
+
+def test_unreadable_span_is_left_out(read_span_bytes):
+    spans = [(BASE + 0x10, 8), (BASE + PAGE + 0x10, 8)]
+    pm = _FakePm(BASE, MEMORY, bad_pages={BASE // PAGE + 1})
+    assert read_span_bytes(pm, spans) == _expected(spans[:1])
+
+
+def test_no_spans(read_span_bytes):
+    assert read_span_bytes(_FakePm(BASE, MEMORY), []) == {}
+
+
+# ── patch_memory_bulk ────────────────────────────────────────────────
+
+@pytest.fixture
+def protect_calls(monkeypatch):
+    """Fake kernel32.VirtualProtectEx; records (address, size, protection)."""
+    calls = []
+
+    def virtual_protect_ex(handle, address, size, protect, old_protect):
+        calls.append((address.value, size, protect))
+        old_protect._obj.value = 0x02  # PAGE_READONLY
+        return 1
+
+    kernel32 = types.SimpleNamespace(VirtualProtectEx=virtual_protect_ex)
+    monkeypatch.setattr(ctypes, "windll", types.SimpleNamespace(kernel32=kernel32), raising=False)
+    return calls
+
+
+def test_bulk_patch_writes_and_counts(patch_memory_bulk, protect_calls):
+    sites = [BASE + 0x10, BASE + 0x40, BASE + 2 * PAGE]
+    pm = _FakePm(BASE, MEMORY)
+    new = b"NEWDATA!"
+    assert patch_memory_bulk(pm, [(a, MEMORY[a - BASE:a - BASE + 8]) for a in sites], new) == 3
+    for a in sites:
+        assert pm.data[a - BASE:a - BASE + 8] == new
+    # Each site made writable, then restored to its saved protection
+    assert protect_calls == [c for a in sites for c in ((a, 8, 0x40), (a, 8, 0x02))]
+
+
+def test_bulk_patch_pads_shorter_data(patch_memory_bulk, protect_calls):
+    site = BASE + 0x100
+    old = MEMORY[0x100:0x10C]
+    pm = _FakePm(BASE, MEMORY)
+    assert patch_memory_bulk(pm, [(site, old)], b"abc") == 1
+    assert pm.data[0x100:0x10C] == b"abc" + bytes(9)
+    assert pm.data[0x10C] == MEMORY[0x10C]
+    assert protect_calls[0] == (site, 12, 0x40)
+
+
+def test_bulk_patch_skips_unreadable_site(patch_memory_bulk, protect_calls):
+    good, bad = BASE + 0x10, BASE + PAGE + 0x10
+    pm = _FakePm(BASE, MEMORY, bad_pages={BASE // PAGE + 1})
+    locations = [(good, MEMORY[0x10:0x18]), (bad, MEMORY[PAGE + 0x10:PAGE + 0x18])]
+    assert patch_memory_bulk(pm, locations, b"NEWDATA!") == 1
+    assert [a for a, _ in pm.writes] == [good]
+
+
+def test_bulk_patch_failed_verification_not_counted(patch_memory_bulk, protect_calls):
+    sites = [BASE + 0x10, BASE + 0x20]
+    pm = _FakePm(BASE, MEMORY, dropped_writes={sites[1]})
+    locations = [(a, MEMORY[a - BASE:a - BASE + 8]) for a in sites]
+    assert patch_memory_bulk(pm, locations, b"NEWDATA!") == 1
+    assert [a for a, _ in pm.writes] == sites
+
+
+def test_bulk_patch_no_locations(patch_memory_bulk, protect_calls):
+    assert patch_memory_bulk(_FakePm(BASE, MEMORY), [], b"x") == 0
+    assert protect_calls == []
+
+
+def test_bulk_patch_no_restore_when_protect_fails(patch_memory_bulk, monkeypatch):
+    calls = []
+
+    def virtual_protect_ex(handle, address, size, protect, old_protect):
+        calls.append(protect)
+        return 0
+
+    kernel32 = types.SimpleNamespace(VirtualProtectEx=virtual_protect_ex)
+    monkeypatch.setattr(ctypes, "windll", types.SimpleNamespace(kernel32=kernel32), raising=False)
+    pm = _FakePm(BASE, MEMORY)
+    assert patch_memory_bulk(pm, [(BASE + 0x10, MEMORY[0x10:0x18])], b"NEWDATA!") == 1
+    assert calls == [0x40]  # write still tried; nothing to restore
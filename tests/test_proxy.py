@@ -0,0 +1,61 @@
+"""Unit tests for OTProxy's pass-through mode over local socket pairs."""
+
+import asyncio
+import socket
+
+import pytest
+
+
+async def _stream_pair():
+    """Two connected (reader, writer) ends over a local socket pair."""
+    a, b = socket.socketpair()
+    return await asyncio.open_connection(sock=a), await asyncio.open_connection(sock=b)
+
+
+async def _relay_session(proxy, to_server: bytes, to_client: bytes):
+    """Run the pass-through loop between a fake client and server.
+
+    Returns what the server and the client received, and whether the loop
+    ended once the client closed its side.
+    """
+    (proxy.client_reader, proxy.client_writer), (client_r, client_w) = await _stream_pair()
+    (proxy.server_reader, proxy.server_writer), (server_r, server_w) = await _stream_pair()
+    relay = asyncio.create_task(proxy._run_passthrough_loop())
+
+    client_w.write(to_server)
+    await client_w.drain()
+    server_w.write(to_client)
+    await server_w.drain()
+    got_server = await asyncio.wait_for(server_r.readexactly(len(to_server)), 5)
+    got_client = await asyncio.wait_for(client_r.readexactly(len(to_client)), 5)
+
+    client_w.close()
+    await asyncio.wait_for(relay, 5)
+    for w in (server_w, proxy.client_writer, proxy.server_writer):
+        w.close()
+    return got_server, got_client, relay.done()
+
+
+def test_passthrough_relays_bytes_both_ways(ot_proxy_cls):
+    proxy = ot_proxy_cls("127.0.0.1", 0, 0, passthrough=True)
+    # Not packet-framed on purpose: the relay must not parse anything
+    to_server = bytes(range(256)) * 700
+    to_client = b"\x05\x00hello" + b"\xff" * 3
+    got_server, got_client, ended = asyncio.run(_relay_session(proxy, to_server, to_client))
+    assert got_server == to_server
+    assert got_client == to_client
+    assert ended
+
+
+@pytest.mark.parametrize("method", ["inject_to_server_nowait", "inject_to_client_nowait"])
+def test_passthrough_rejects_injection(ot_proxy_cls, method):
+    proxy = ot_proxy_cls("127.0.0.1", 0, 0, passthrough=True)
+    with pytest.raises(RuntimeError):
+        getattr(proxy, method)(b"\x14")
+
+
+def test_default_proxy_is_not_passthrough(ot_proxy_cls):
+    proxy = ot_proxy_cls("127.0.0.1", 0, 0)
+    assert not proxy.passthrough
+    proxy.inject_to_server_nowait(b"\x14")  # only warns: not logged in yet
+    assert proxy._inject_to_server.empty()
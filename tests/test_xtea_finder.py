@@ -0,0 +1,121 @@
+"""Cross-backend tests for xtea_finder's key-candidate scan.
+
+Every _scan_data_* backend must report exactly the windows that
+_is_key_candidate accepts, at offsets 0, 4, ... below len(data) - 16.
+"""
+
+import random
+import struct
+
+import pytest
+
+_WORD = struct.Struct("<I")
+
+
+def _expected(xf, data):
+    found = []
+    for offset in range(0, len(data) - 16, 4):
+        keys = struct.unpack_from("<4I", data, offset)
+        if xf._is_key_candidate(keys):
+            found.append((offset, keys))
+    return found
+
+
+# Values on either side of each per-word threshold; the last four are
+# ASCII-range words whose top byte is 31, 32, 126 or 127
+_EDGES = (999, 1000, 0x003FFFFF, 0x00400000, 0x7FFFFFFF, 0x80000000,
+          0x1F414243, 0x20414243, 0x7E414243, 0x7F414243)
+
+
+def _word(byte_values):
+    return int.from_bytes(bytes(byte_values), "little")
+
+
+def _mixed(seed, n_words):
+    """Words from the classes the rules tell apart, in runs."""
+    rng = random.Random(seed)
+    makers = [
+        lambda: 0,                                                  # zero runs
+        lambda: rng.randint(0x00400000, 0x7FFFFFFF),                # pointer-like
+        lambda: _word(rng.randint(32, 126) for _ in range(4)),      # ASCII
+        lambda: _word([rng.randrange(256)] * 3 + [rng.randrange(256)]),  # AAAB
+        lambda: _word(rng.sample(range(256), 2) * 2),               # ABAB: 2 distinct
+        lambda: _word([7, 7] + rng.sample(range(8, 256), 2)),       # AABC: 3 distinct
+        lambda: rng.randrange(1000),                                # small values
+        lambda: rng.getrandbits(32),                                # key-like
+        lambda: rng.choice(_EDGES),                                 # rule boundaries
+    ]
+    words = []
+    while len(words) < n_words:
+        make = rng.choice(makers)
+        run = rng.randint(1, 6)
+        if rng.random() < 0.2:
+            words.extend([make()] * run)                            # repeated value
+        else:
+            words.extend(make() for _ in range(run))
+    return b"".join(_WORD.pack(w) for w in words[:n_words])
+
+
+_BUFFERS = (
+    [("len%d" % n, random.Random(n).randbytes(n)) for n in (0, 15, 16, 17, 20)]
+    + [("mixed%d" % s, _mixed(s, 600) + bytes(s % 4)) for s in range(6)]
+    + [("zeros", bytes(256)), ("ascii", b"the quick brown fox jumps over " * 8)]
+    + [("tiles", _mixed(7, 2600) + b"\x01\x02")]  # spans several native-kernel tiles
+)
+
+
+@pytest.fixture(params=["py", "np", "nb", "native"])
+def scan(request, xtea_finder):
+    """One _scan_data_* backend, skipped if it isn't available here."""
+    xf = xtea_finder
+    available = {
+        "py": True,
+        "np": xf.np is not None,
+        "nb": xf._scan_windows_nb is not None,
+        "native": xf._scan_lib is not None,
+    }
+    if not available[request.param]:
+        pytest.skip(f"{request.param} scan backend not available")
+    return getattr(xf, "_scan_data_" + request.param)
+
+
+@pytest.mark.parametrize("name, data", _BUFFERS, ids=[name for name, _ in _BUFFERS])
+def test_backend_matches_predicate(xtea_finder, scan, name, data):
+    assert scan(data) == _expected(xtea_finder, data)
+
+
+def test_mixed_buffers_have_candidates(xtea_finder):
+    # Guards against the comparison above passing on empty results only
+    assert any(_expected(xtea_finder, data) for _, data in _BUFFERS)
+
+
+def test_backend_accepts_memoryview_slice(xtea_finder, scan):
+    data = _mixed(99, 300)
+    framed = bytearray(b"\xAA" * 3 + data + b"\x55" * 5)
+    view = memoryview(framed)[3:3 + len(data)]
+    assert scan(view) == _expected(xtea_finder, data)
+    assert scan(bytearray(data)) == _expected(xtea_finder, data)
+
+
+@pytest.mark.parametrize("chunk_words", [1, 5, 64])
+def test_backend_chunk_boundaries(xtea_finder, scan, monkeypatch, chunk_words):
+    # Windows are checked per chunk of _CHUNK_WORDS; shrink it so the
+    # buffers cross many chunk boundaries
+    monkeypatch.setattr(xtea_finder, "_CHUNK_WORDS", chunk_words)
+    for seed in range(3):
+        data = _mixed(seed, 400) + bytes(seed)
+        assert scan(data) == _expected(xtea_finder, data)
+
+
+def test_backend_distinct_byte_patterns(xtea_finder, scan):
+    # Every word over a 4-letter byte alphabet (all equal-pair layouts,
+    # from 1 to 4 distinct bytes), each between two key-like words, so
+    # the distinct-byte rule decides the windows around it
+    rng = random.Random(4)
+    words = []
+    for pattern in range(256):
+        words.append(_word(0x11 * (1 + ((pattern >> s) & 3)) + 0x80 for s in (0, 2, 4, 6)))
+        words.append(rng.getrandbits(32))
+        words.append(_word([rng.randrange(256)] * 2 + [0x90, 0x91]))
+    data = b"".join(_WORD.pack(w) for w in words)
+    assert scan(data) == _expected(xtea_finder, data)
@@ -10,11 +10,439 @@ Strategy:
 3. Validate by trying to decrypt a captured packet
 """
 
+import ctypes
+import math
+import os
+from array import array
+from collections import Counter
+from ctypes import wintypes
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 import pymem
 import pymem.process
 import struct
 import sys
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Optional native scan kernel (build with `cd native && make`)
+_NATIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "native")
+_SCAN_LIB = "xtea_scan.dll" if sys.platform == "win32" else "libxtea_scan.so"
+
+try:
+    _scan_lib = ctypes.CDLL(os.path.join(_NATIVE_DIR, _SCAN_LIB))
+    _scan_lib.xtea_scan.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p]
+    _scan_lib.xtea_scan.restype = ctypes.c_size_t
+except OSError:
+    _scan_lib = None
+
+
+# 1 where both bytes of a 16-bit value are printable ASCII (32..126); a
+# uint32 is all-ASCII iff both of its halves are
+_ASCII_HALF = bytes(32 <= (h & 0xFF) <= 126 and 32 <= (h >> 8) <= 126 for h in range(65536))
+
+
+def _is_key_candidate(keys: tuple[int, int, int, int]) -> bool:
+    """
+    Whether 4 consecutive uint32 values look like an XTEA key.
+
+    XTEA keys are 4 uint32 values that should be:
+    - Non-zero (at least 3 of 4)
+    - Not all the same value
+    - Not sequential/simple patterns
+    """
+    # Checks are ordered by cost per rejection: the cheap ones that reject
+    # most heap windows (zeros, pointers) first, the rare ones last.
+
+    # Counts are sums of bools over the unpacked words, not generators
+    k0, k1, k2, k3 = keys
+
+    # Filter criteria
+    non_zero = (k0 != 0) + (k1 != 0) + (k2 != 0) + (k3 != 0)
+    if non_zero < 3:
+        return False
+
+    # Skip values that look like pointers (common in heap)
+    pointer_like = ((0x00400000 <= k0 <= 0x7FFFFFFF) + (0x00400000 <= k1 <= 0x7FFFFFFF)
+                    + (0x00400000 <= k2 <= 0x7FFFFFFF) + (0x00400000 <= k3 <= 0x7FFFFFFF))
+    if pointer_like >= 3:
+        return False
+
+    # Look for keys that have good entropy (at least 3 distinct bytes)
+    entropy_score = ((len(set(k0.to_bytes(4, 'little'))) >= 3)
+                     + (len(set(k1.to_bytes(4, 'little'))) >= 3)
+                     + (len(set(k2.to_bytes(4, 'little'))) >= 3)
+                     + (len(set(k3.to_bytes(4, 'little'))) >= 3))
+    if entropy_score < 2:
+        return False
+
+    # Skip very small values (likely not crypto keys)
+    if k0 < 1000 and k1 < 1000 and k2 < 1000 and k3 < 1000:
+        return False
+
+    # Skip trivial patterns
+    if k0 == k1 == k2 == k3:
+        return False
+
+    # Skip values that are all in ASCII range
+    ascii_like = ((_ASCII_HALF[k0 & 0xFFFF] & _ASCII_HALF[k0 >> 16])
+                  + (_ASCII_HALF[k1 & 0xFFFF] & _ASCII_HALF[k1 >> 16])
+                  + (_ASCII_HALF[k2 & 0xFFFF] & _ASCII_HALF[k2 >> 16])
+                  + (_ASCII_HALF[k3 & 0xFFFF] & _ASCII_HALF[k3 >> 16]))
+    return ascii_like < 3
+
+
+# Windows handled per pass by the _scan_data_* functions; bounds their
+# temporaries (unpacked ints, numpy arrays) per chunk
+_CHUNK_WORDS = 1 << 20
+
+
+def _scan_data_py(data: bytes) -> list[tuple[int, tuple]]:
+    """
+    Check every 4-byte aligned window of data with _is_key_candidate.
+
+    Each chunk is unpacked in one call and the windows are formed by
+    zipping four shifted views of the words, rather than unpacking 16
+    bytes per offset.
+    """
+    # Windows at offsets 0, 4, ... below len(data) - 16
+    total = len(range(0, len(data) - 16, 4))
+    found = []
+    for start in range(0, total, _CHUNK_WORDS):
+        n = min(_CHUNK_WORDS, total - start)
+        words = struct.unpack_from(f'<{n + 3}I', data, start * 4)
+        for i, keys in enumerate(zip(words, words[1:], words[2:], words[3:]), start):
+            if _is_key_candidate(keys):
+                found.append((i * 4, keys))
+    return found
+
+
+def _window_count(flags, n: int):
+    """Per window of 4 consecutive words, how many of them have the flag set."""
+    count = flags[:n].astype(np.uint8)
+    count += flags[1:n + 1]
+    count += flags[2:n + 2]
+    count += flags[3:n + 3]
+    return count
+
+
+def _scan_data_np(data: bytes) -> list[tuple[int, tuple]]:
+    """
+    Vectorised _scan_data_py: the per-word tests run as numpy passes over the
+    region, and the window rules of _is_key_candidate become counts over 4
+    consecutive words. Returns the same windows in the same order.
+    """
+    # Same windows as _scan_data_py
+    total = len(range(0, len(data) - 16, 4))
+    if total <= 0:
+        return []
+    words = np.frombuffer(data, dtype='<u4', count=total + 3)
+
+    found = []
+    for start in range(0, total, _CHUNK_WORDS):
+        n = min(_CHUNK_WORDS, total - start)
+        w = words[start:start + n + 3]
+        b = w.view(np.uint8).reshape(-1, 4)
+        b0, b1, b2, b3 = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+
+        in_ascii = (b >= 32) & (b <= 126)
+        # A word has >= 3 distinct bytes iff at most one of its 6 byte pairs match
+        equal_pairs = (b0 == b1).astype(np.uint8)
+        equal_pairs += b0 == b2
+        equal_pairs += b0 == b3
+        equal_pairs += b1 == b2
+        equal_pairs += b1 == b3
+        equal_pairs += b2 == b3
+
+        mask = _window_count(w != 0, n) >= 3
+        mask &= ~((w[:n] == w[1:n + 1]) & (w[1:n + 1] == w[2:n + 2]) & (w[2:n + 2] == w[3:n + 3]))
+        mask &= _window_count(w < 1000, n) < 4
+        mask &= _window_count((w >= 0x00400000) & (w <= 0x7FFFFFFF), n) < 3
+        mask &= _window_count(in_ascii.all(axis=1), n) < 3
+        mask &= _window_count(equal_pairs <= 1, n) >= 2
+
+        _gather_windows(found, data, start, np.flatnonzero(mask).tolist())
+    return found
+
+
+_WINDOW = struct.Struct('<4I')
+
+
+def _gather_windows(found: list, data, start: int, idx):
+    """Append (offset, keys) for the matching windows idx of a chunk starting at word start."""
+    # One unpack per match is cheaper than stacking the key columns in numpy
+    # and converting the rows back to tuples
+    unpack_from = _WINDOW.unpack_from
+    for i in idx:
+        offset = 4 * (start + i)
+        found.append((offset, unpack_from(data, offset)))
+
+
+_scan_windows_nb = None
+if np is not None and njit is not None:
+    # Bits of _word_flags(k), one per per-word test of _is_key_candidate
+    _F_NONZERO, _F_SMALL, _F_POINTER, _F_ASCII, _F_SPREAD = 1, 2, 4, 8, 16
+
+    @njit(cache=True, boundscheck=False)
+    def _word_flags(k):
+        b0 = k & 0xFF
+        b1 = (k >> 8) & 0xFF
+        b2 = (k >> 16) & 0xFF
+        b3 = k >> 24
+        f = 0
+        if k != 0:
+            f |= _F_NONZERO
+        if k < 1000:
+            f |= _F_SMALL
+        if 0x00400000 <= k <= 0x7FFFFFFF:
+            f |= _F_POINTER
+        if 32 <= b0 <= 126 and 32 <= b1 <= 126 and 32 <= b2 <= 126 and 32 <= b3 <= 126:
+            f |= _F_ASCII
+        equal_pairs = (b0 == b1) + (b0 == b2) + (b0 == b3) + (b1 == b2) + (b1 == b3) + (b2 == b3)
+        if equal_pairs <= 1:
+            f |= _F_SPREAD
+        return f
+
+    # One pass over words: flags are computed once per word and carried in
+    # a sliding window of 4. Writes the indices of the matching windows to
+    # out and returns how many there are. Releases the GIL so the next
+    # block's read can run meanwhile (see _scan_region).
+    @njit(cache=True, boundscheck=False, nogil=True)
+    def _scan_windows_nb(words, n, out):
+        count = 0
+        fa = _word_flags(np.int64(words[0]))
+        fb = _word_flags(np.int64(words[1]))
+        fc = _word_flags(np.int64(words[2]))
+        for i in range(n):
+            fd = _word_flags(np.int64(words[i + 3]))
+            ok = (
+                ((fa & 1) + (fb & 1) + (fc & 1) + (fd & 1)) >= 3
+                and not (words[i] == words[i + 1] == words[i + 2] == words[i + 3])
+                and (fa & fb & fc & fd & _F_SMALL) == 0
+                and (((fa >> 2) & 1) + ((fb >> 2) & 1) + ((fc >> 2) & 1) + ((fd >> 2) & 1)) < 3
+                and (((fa >> 3) & 1) + ((fb >> 3) & 1) + ((fc >> 3) & 1) + ((fd >> 3) & 1)) < 3
+                and (((fa >> 4) & 1) + ((fb >> 4) & 1) + ((fc >> 4) & 1) + ((fd >> 4) & 1)) >= 2
+            )
+            if ok:
+                out[count] = i
+                count += 1
+            fa, fb, fc = fb, fc, fd
+        return count
+
+
+def _scan_data_nb(data: bytes) -> list[tuple[int, tuple]]:
+    """_scan_data_np with the window tests fused into one numba pass per chunk."""
+    total = len(range(0, len(data) - 16, 4))
+    if total <= 0:
+        return []
+    words = np.frombuffer(data, dtype='<u4', count=total + 3)
+    out = np.empty(min(total, _CHUNK_WORDS), dtype=np.int64)
+
+    found = []
+    for start in range(0, total, _CHUNK_WORDS):
+        n = min(_CHUNK_WORDS, total - start)
+        w = words[start:start + n + 3]
+        _gather_windows(found, data, start, out[:_scan_windows_nb(w, n, out)].tolist())
+    return found
+
+
+def _scan_data_native(data) -> list[tuple[int, tuple]]:
+    """_scan_data_py with the window tests run by native/xtea_scan.c, one call per chunk."""
+    total = len(range(0, len(data) - 16, 4))
+    if total <= 0:
+        return []
+    if memoryview(data).readonly:
+        data = bytes(data)
+        addr = ctypes.cast(ctypes.c_char_p(data), ctypes.c_void_p).value
+    else:
+        addr = ctypes.addressof(ctypes.c_char.from_buffer(data))
+    out = array('q', bytes(8 * min(total, _CHUNK_WORDS)))
+    out_addr = out.buffer_info()[0]
+
+    found = []
+    for start in range(0, total, _CHUNK_WORDS):
+        n = min(_CHUNK_WORDS, total - start)
+        count = _scan_lib.xtea_scan(addr + 4 * start, n, out_addr)
+        _gather_windows(found, data, start, out[:count])
+    return found
+
+
+# Fastest available: native library, numba, numpy, then the pure-Python loop
+if _scan_lib is not None:
+    _scan_data = _scan_data_native
+elif _scan_windows_nb is not None:
+    _scan_data = _scan_data_nb
+elif np is not None:
+    _scan_data = _scan_data_np
+else:
+    _scan_data = _scan_data_py
+
+
+# Region triage: before a region is read and scanned, a sample spread
+# evenly across it is checked, and the region is skipped if the sample is
+# mostly zeros, mostly pointers, or low-entropy filler.
+_TRIAGE_SLICES = 8
+_TRIAGE_SLICE_BYTES = 512
+_TRIAGE_MAX_ZERO_FRAC = 0.75
+_TRIAGE_MAX_POINTER_FRAC = 0.90
+_TRIAGE_MIN_ENTROPY = 1.0  # bits per byte
+_TRIAGE_SAMPLE = struct.Struct(f'<{_TRIAGE_SLICES * _TRIAGE_SLICE_BYTES // 4}I')
+
+
+def _triage_region(pm: pymem.Pymem, base: int, size: int) -> str | None:
+    """
+    Decide from a sample whether a region is worth scanning.
+
+    Returns the reason to skip it ("zero", "pointer" or "entropy"), or None
+    to scan it. Regions only a few samples long are always scanned.
+    """
+    if size < 2 * _TRIAGE_SAMPLE.size:
+        return None
+    step = (size // _TRIAGE_SLICES) & ~3
+    sample = b"".join(
+        pm.read_bytes(base + i * step, _TRIAGE_SLICE_BYTES) for i in range(_TRIAGE_SLICES)
+    )
+    words = _TRIAGE_SAMPLE.unpack(sample)
+
+    if words.count(0) > _TRIAGE_MAX_ZERO_FRAC * len(words):
+        return "zero"
+    pointer_like = sum(0x00400000 <= k <= 0x7FFFFFFF for k in words)
+    if pointer_like > _TRIAGE_MAX_POINTER_FRAC * len(words):
+        return "pointer"
+    entropy = -sum(c / len(sample) * math.log2(c / len(sample)) for c in Counter(sample).values())
+    if entropy < _TRIAGE_MIN_ENTROPY:
+        return "entropy"
+    return None
+
+
+MEM_COMMIT = 0x1000
+PAGE_READONLY = 0x02
+PAGE_READWRITE = 0x04
+PAGE_EXECUTE_READ = 0x20
+PAGE_EXECUTE_READWRITE = 0x40
+PAGE_GUARD = 0x100
+PAGE_NOCACHE = 0x200
+PAGE_WRITECOMBINE = 0x400
+ALLOCATION_GRANULARITY = 0x10000
+
+# Protect holds exactly one base protection, optionally combined with
+# modifier bits; a region is scanned if its base protection is one of
+# these and it has no modifiers
+READABLE_MASK = PAGE_READONLY | PAGE_READWRITE | PAGE_EXECUTE_READ | PAGE_EXECUTE_READWRITE
+PAGE_MODIFIERS = PAGE_GUARD | PAGE_NOCACHE | PAGE_WRITECOMBINE
+
+
+# Addresses as c_size_t rather than c_void_p, which reads back as None
+# for address 0
+class MEMORY_BASIC_INFORMATION(ctypes.Structure):
+    _fields_ = [
+        ("BaseAddress", ctypes.c_size_t),
+        ("AllocationBase", ctypes.c_size_t),
+        ("AllocationProtect", wintypes.DWORD),
+        ("RegionSize", ctypes.c_size_t),
+        ("State", wintypes.DWORD),
+        ("Protect", wintypes.DWORD),
+        ("Type", wintypes.DWORD),
+    ]
+
+
+# Own kernel32 instance, so these prototypes don't affect pymem's calls
+# through ctypes.windll
+kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+VirtualQueryEx = kernel32.VirtualQueryEx
+VirtualQueryEx.argtypes = [wintypes.HANDLE, ctypes.c_void_p,
+                           ctypes.POINTER(MEMORY_BASIC_INFORMATION), ctypes.c_size_t]
+VirtualQueryEx.restype = ctypes.c_size_t
+
+ReadProcessMemory = kernel32.ReadProcessMemory
+ReadProcessMemory.argtypes = [wintypes.HANDLE, ctypes.c_void_p, ctypes.c_void_p,
+                              ctypes.c_size_t, ctypes.POINTER(ctypes.c_size_t)]
+ReadProcessMemory.restype = wintypes.BOOL
+
+
+def _read_into(pm: pymem.Pymem, address: int, buf: bytearray, offset: int, size: int) -> int:
+    """
+    ReadProcessMemory size bytes at address straight into buf[offset:],
+    without an intermediate bytes object. Returns the number of bytes
+    read; raises OSError if the read fails.
+    """
+    read = ctypes.c_size_t()
+    dest = ctypes.addressof(ctypes.c_char.from_buffer(buf, offset))
+    if not ReadProcessMemory(pm.process_handle, address, dest, size, ctypes.byref(read)):
+        raise ctypes.WinError(ctypes.get_last_error())
+    return read.value
+
+
+# Regions are read and scanned in blocks of this size. Each block is read
+# with the 16 bytes after it, so every window starting in the block is
+# scanned in that block, including those that straddle into the next one.
+_SCAN_BLOCK = 1024 * 1024
+
+# Per pool worker (set up by _init_scan_worker): the target process, two
+# block buffers, and a reader thread that fills one buffer while the
+# other is being scanned
+_worker_pm = None
+_worker_bufs = ()
+_worker_reader = None
+
+
+def _init_scan_worker(pid: int):
+    """ProcessPoolExecutor initializer: open the target process once per worker."""
+    global _worker_pm, _worker_bufs, _worker_reader
+    _worker_pm = pymem.Pymem()
+    _worker_pm.open_process_from_id(pid)
+    _worker_bufs = (bytearray(_SCAN_BLOCK + 16), bytearray(_SCAN_BLOCK + 16))
+    _worker_reader = ThreadPoolExecutor(max_workers=1)
+
+
+def _read_block(index: int, base: int, size: int, pos: int) -> int:
+    """Read the block at pos of the region [base, base + size) into _worker_bufs[index]."""
+    return _read_into(_worker_pm, base + pos, _worker_bufs[index], 0,
+                      min(_SCAN_BLOCK + 16, size - pos))
+
+
+def _scan_region(base: int, size: int) -> tuple[str, list[tuple[int, tuple]]]:
+    """
+    Triage, read and scan one memory region (runs in a pool worker).
+
+    Returns ("scanned", candidates), (reason, []) if _triage_region
+    skipped the region, or ("unreadable", []) if it could not be read.
+    A key value found more than once is returned at its first address only.
+
+    The region is read in _SCAN_BLOCK blocks, double-buffered: the read of
+    the next block is started on the worker's reader thread before the
+    current one is scanned.
+    """
+    try:
+        skip = _triage_region(_worker_pm, base, size)
+    except Exception:
+        return "unreadable", []
+    if skip is not None:
+        return skip, []
+
+    blocks = range(0, max(size - 16, 0), _SCAN_BLOCK)
+    first_at = {}
+    pending = _worker_reader.submit(_read_block, 0, base, size, 0) if blocks else None
+    for i, pos in enumerate(blocks):
+        try:
+            n = pending.result()
+        except Exception:
+            return "unreadable", []
+        if i + 1 < len(blocks):
+            pending = _worker_reader.submit(_read_block, (i + 1) % 2, base, size, blocks[i + 1])
+        for offset, keys in _scan_data(memoryview(_worker_bufs[i % 2])[:n]):
+            first_at.setdefault(keys, base + pos + offset)
+    return "scanned", [(addr, keys) for keys, addr in first_at.items()]
+
 
 def find_xtea_keys_by_pattern(pm: pymem.Pymem) -> list[tuple[int, int, int, int]]:
     """
@@ -34,112 +462,86 @@ def find_xtea_keys_by_pattern(pm: pymem.Pymem) -> list[tuple[int, int, int, int]
 
     print("\nScanning heap memory for XTEA key candidates...")
 
-    import ctypes
-    from ctypes import wintypes
-
-    PROCESS_QUERY_INFORMATION = 0x0400
-    PROCESS_VM_READ = 0x0010
-    MEM_COMMIT = 0x1000
-    PAGE_READWRITE = 0x04
-    PAGE_READONLY = 0x02
-    PAGE_EXECUTE_READ = 0x20
-    PAGE_EXECUTE_READWRITE = 0x40
-
-    class MEMORY_BASIC_INFORMATION(ctypes.Structure):
-        _fields_ = [
-            ("BaseAddress", ctypes.c_void_p),
-            ("AllocationBase", ctypes.c_void_p),
-            ("AllocationProtect", wintypes.DWORD),
-            ("RegionSize", ctypes.c_size_t),
-            ("State", wintypes.DWORD),
-            ("Protect", wintypes.DWORD),
-            ("Type", wintypes.DWORD),
-        ]
-
-    VirtualQueryEx = ctypes.windll.kernel32.VirtualQueryEx
-    ReadProcessMemory = ctypes.windll.kernel32.ReadProcessMemory
-
-    readable_protections = {PAGE_READWRITE, PAGE_READONLY, PAGE_EXECUTE_READ, PAGE_EXECUTE_READWRITE}
-
     address = 0
     mbi = MEMORY_BASIC_INFORMATION()
-    found_keys = []
-    regions_scanned = 0
+    regions = []
 
     while address < 0x7FFFFFFF:  # 32-bit process
-        result = VirtualQueryEx(
-            pm.process_handle,
-            ctypes.c_void_p(address),
-            ctypes.byref(mbi),
-            ctypes.sizeof(mbi)
-        )
+        result = VirtualQueryEx(pm.process_handle, address, ctypes.byref(mbi), ctypes.sizeof(mbi))
 
         if result == 0:
-            break
+            # Nothing queryable here; retry from the next allocation boundary
+            address = (address // ALLOCATION_GRANULARITY + 1) * ALLOCATION_GRANULARITY
+            continue
 
         if (mbi.State == MEM_COMMIT and
-            mbi.Protect in readable_protections and
+            mbi.Protect & READABLE_MASK and
+            not mbi.Protect & PAGE_MODIFIERS and
             mbi.RegionSize > 0 and
             mbi.RegionSize < 100 * 1024 * 1024):  # Skip regions > 100MB
+            regions.append((mbi.BaseAddress, mbi.RegionSize))
 
-            try:
-                data = pm.read_bytes(mbi.BaseAddress, mbi.RegionSize)
-                regions_scanned += 1
+        address = mbi.BaseAddress + mbi.RegionSize
 
-                # Scan for potential XTEA keys
-                # XTEA keys are 4 uint32 values that should be:
-                # - Non-zero (at least 3 of 4)
-                # - Not all the same value
-                # - Not sequential/simple patterns
-                for offset in range(0, len(data) - 16, 4):
-                    keys = struct.unpack_from('<4I', data, offset)
-
-                    # Filter criteria
-                    non_zero = sum(1 for k in keys if k != 0)
-                    if non_zero < 3:
-                        continue
-
-                    # Skip trivial patterns
-                    if len(set(keys)) == 1:
-                        continue
-
-                    # Skip very small values (likely not crypto keys)
-                    if all(k < 1000 for k in keys):
-                        continue
-
-                    # Skip values that look like pointers (common in heap)
-                    pointer_like = sum(1 for k in keys if 0x00400000 <= k <= 0x7FFFFFFF)
-                    if pointer_like >= 3:
-                        continue
-
-                    # Skip values that are all in ASCII range
-                    ascii_like = sum(1 for k in keys if all(32 <= b <= 126 for b in k.to_bytes(4, 'little')))
-                    if ascii_like >= 3:
-                        continue
-
-                    # Look for keys that have good entropy (spread across byte range)
-                    entropy_score = 0
-                    for k in keys:
-                        key_bytes = k.to_bytes(4, 'little')
-                        unique_bytes = len(set(key_bytes))
-                        if unique_bytes >= 3:
-                            entropy_score += 1
-
-                    if entropy_score >= 2:
-                        addr = mbi.BaseAddress + offset
+    # Regions are independent: read and scan them in parallel, one target
+    # process handle per worker. map() keeps the results in address order.
+    found_keys = []
+    seen_keys = set()
+    regions_scanned = 0
+    regions_skipped = Counter()
+    with ProcessPoolExecutor(initializer=_init_scan_worker, initargs=(pm.process_id,)) as pool:
+        bases = [base for base, _ in regions]
+        sizes = [size for _, size in regions]
+        for status, found in pool.map(_scan_region, bases, sizes, chunksize=4):
+            if status == "scanned":
+                regions_scanned += 1
+                for addr, keys in found:
+                    if keys not in seen_keys:
+                        seen_keys.add(keys)
                         found_keys.append((addr, keys))
-
-            except Exception:
-                pass
-
-        address = mbi.BaseAddress + mbi.RegionSize
+            elif status != "unreadable":
+                regions_skipped[status] += 1
 
     print(f"Scanned {regions_scanned} memory regions")
-    print(f"Found {len(found_keys)} potential XTEA key candidates")
+    if regions_skipped:
+        reasons = ", ".join(f"{reason}: {n}" for reason, n in regions_skipped.most_common())
+        print(f"Skipped {sum(regions_skipped.values())} regions after sampling ({reasons})")
+    print(f"Found {len(found_keys)} distinct potential XTEA key candidates")
 
     return found_keys
 
 
+# find_xtea_near_protocol streams the module through one buffer of this size
+# instead of reading the whole image into a bytes object
+_SEARCH_CHUNK = 1024 * 1024
+
+
+def _iter_pattern_hits(pm: pymem.Pymem, base: int, size: int, pattern: bytes):
+    """
+    Yield the address of every occurrence of pattern in [base, base + size).
+
+    The range is read block by block into a single reused bytearray; the
+    last len(pattern) - 1 bytes of each block are carried to the front of
+    the next so matches that straddle two blocks are still found. Raises
+    OSError if a read fails.
+    """
+    keep = len(pattern) - 1
+    buf = bytearray(keep + _SEARCH_CHUNK)
+    carried = 0  # bytes of the previous block kept in buf[keep - carried:keep]
+    pos = 0
+    while pos < size:
+        n = min(_SEARCH_CHUNK, size - pos)
+        start = keep - carried
+        end = keep + _read_into(pm, base + pos, buf, keep, n)
+        idx = buf.find(pattern, start, end)
+        while idx != -1:
+            yield base + pos + idx - keep
+            idx = buf.find(pattern, idx + 1, end)
+        carried = min(keep, end - start)
+        buf[keep - carried:keep] = buf[end - carried:end]
+        pos += n
+
+
 def find_xtea_near_protocol(pm: pymem.Pymem) -> list[tuple[int, tuple]]:
     """
     Alternative approach: search for XTEA keys near ProtocolGame vtable references.
@@ -153,7 +555,7 @@ def find_xtea_near_protocol(pm: pymem.Pymem) -> list[tuple[int, tuple]]:
         base = pm.base_address
         module_size = 0
         for module in pymem.process.enum_process_module(pm.process_handle):
-            if "dbvStart" in module.name.lower():
+            if "dbvstart" in module.name.lower():
                 module_size = module.SizeOfImage
                 break
 
@@ -163,16 +565,10 @@ def find_xtea_near_protocol(pm: pymem.Pymem) -> list[tuple[int, tuple]]:
         print(f"\nSearching for ProtocolGame references near base 0x{base:08X}...")
 
         try:
-            data = pm.read_bytes(base, min(module_size, 0x2000000))
-            idx = 0
             pg_addrs = []
-            while True:
-                idx = data.find(pattern, idx)
-                if idx == -1:
-                    break
-                pg_addrs.append(base + idx)
-                print(f"  Found 'ProtocolGame' string at 0x{base + idx:08X}")
-                idx += 1
+            for addr in _iter_pattern_hits(pm, base, module_size, pattern):
+                pg_addrs.append(addr)
+                print(f"  Found 'ProtocolGame' string at 0x{addr:08X}")
         except Exception as e:
             print(f"  Error reading module: {e}")
 